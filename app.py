@@ -1,12 +1,11 @@
 import streamlit as st
-import os
+import time
 from dotenv import load_dotenv
-from resume_parser import extract_resume_text
-from jd_matcher import match_resume_to_jd
-from keyword_analyzer import missing_keywords
-from score_generator import generate_score
+from resume_parser import extract_resume_text_from_bytes
+from pipeline import start_analysis, STAGES
+from resume_rewriter import rewrite_resume_stream
+from job_matcher import rank_jobs_for_resume
 from ai_suggester import get_resume_suggestions
-from resume_rewriter import rewrite_resume
 
 # Load environment variables from .env file
 load_dotenv()
@@ -22,6 +21,66 @@ st.set_page_config(
 # --- UI ELEMENTS ---
 st.title("📄 Advanced Resume Optimizer")
 
+mode = st.sidebar.radio("Mode", ["Analyze against a job description", "Find matching open jobs"])
+
+
+@st.cache_data(ttl=300)
+def load_open_jobs():
+    """(id, title, description) for every stored job, read through the backend's database config."""
+    from api import app as api_app
+    from models import db, Job
+    with api_app.app_context():
+        return [tuple(row) for row in db.session.query(Job.id, Job.title, Job.description).all()]
+
+
+# --- JOB MATCHING MODE: one resume against every open job ---
+if mode == "Find matching open jobs":
+    st.header("Upload Your Resume")
+    match_file = st.file_uploader("Choose a PDF or DOCX file", type=["pdf", "docx"], key="match_file")
+    top_k = st.slider("Number of jobs to show", 1, 25, 5)
+
+    if st.button("Find Matching Jobs"):
+        if match_file is None:
+            st.warning("Please upload a resume.")
+        else:
+            with st.spinner("Scoring your resume against all open jobs..."):
+                try:
+                    text = extract_resume_text_from_bytes(match_file.getvalue(), match_file.name)
+                except ValueError as e:
+                    st.error(str(e))
+                    text = ""
+                if text:
+                    # Kept in session state so opening a job (a rerun) doesn't recompute the ranking
+                    st.session_state["match_resume_text"] = text
+                    from api import app as api_app
+                    # Job keywords and corpus statistics are read from the backend database
+                    with api_app.app_context():
+                        st.session_state["job_matches"] = rank_jobs_for_resume(text, load_open_jobs(), top_k)
+                    st.session_state["job_suggestions"] = {}
+                else:
+                    st.error("Could not extract text from the resume. Please try another file.")
+
+    matches = st.session_state.get("job_matches")
+    if matches is not None:
+        if not matches:
+            st.info("No open jobs found.")
+        for match in matches:
+            with st.expander(f"{match['title']} — {match['matchScore']}% match"):
+                st.write(f"Semantic similarity: {match['semanticSimilarity']}%")
+                st.write("Missing keywords: " + (", ".join(match["missingKeywords"]) or "none"))
+                suggestions = st.session_state["job_suggestions"]
+                # LLM suggestions are generated only for the jobs the user asks about
+                if match["jobId"] not in suggestions:
+                    if st.button("Get AI suggestions", key=f"suggest_{match['jobId']}"):
+                        jd = next(j[2] for j in load_open_jobs() if j[0] == match["jobId"])
+                        with st.spinner("Generating suggestions..."):
+                            suggestions[match["jobId"]] = get_resume_suggestions(
+                                st.session_state["match_resume_text"], jd
+                            )
+                if match["jobId"] in suggestions:
+                    st.markdown(suggestions[match["jobId"]])
+    st.stop()
+
 # Job Description
 st.header("Job Description")
 jd_text = st.text_area("Paste the Job Description here:", height=200)
@@ -34,46 +93,67 @@ uploaded_file = st.file_uploader("Choose a PDF or DOCX file", type=["pdf", "docx
 if st.button("Analyze Resume"):
     if uploaded_file is not None and jd_text:
         with st.spinner("Analyzing..."):
-            # Save the uploaded file temporarily
-            with open(uploaded_file.name, "wb") as f:
-                f.write(uploaded_file.getbuffer())
-
-            # Extract text from resume
-            resume_text = extract_resume_text(uploaded_file.name)
+            # Extract text straight from the uploaded bytes (no temp file; repeat uploads hit the parse cache)
+            try:
+                resume_text = extract_resume_text_from_bytes(uploaded_file.getvalue(), uploaded_file.name)
+            except ValueError as e:
+                st.error(str(e))
+                resume_text = None
 
             if resume_text:
-                # --- CALCULATIONS ---
-                similarity_score = match_resume_to_jd(resume_text, jd_text)
-                missing = missing_keywords(resume_text, jd_text)
-                final_score = generate_score(similarity_score, missing)
-                suggestions = get_resume_suggestions(resume_text, jd_text)
-                rewritten_resume = rewrite_resume(resume_text, jd_text)
+                # --- CALCULATIONS (scoring stages run in the background while the rewrite streams) ---
+                scoring_stages = {name: fn for name, fn in STAGES.items() if name != "rewrite"}
+                analysis = start_analysis(resume_text, jd_text, stages=scoring_stages)
 
 
                 # --- DISPLAY RESULTS ---
                 st.header("Analysis Results")
-                st.subheader(f"Overall Match Score: {final_score}%")
-                st.progress(int(final_score))
+                results_area = st.container()
 
 
-                st.subheader(f"Semantic Similarity with Job Description: {similarity_score}%")
+                st.subheader("Rewritten Resume Summary:")
+                rewrite_area = st.empty()
+                start = time.perf_counter()
+                first_token = None
+                rewritten_resume = ""
+                try:
+                    for fragment in rewrite_resume_stream(resume_text, jd_text):
+                        if first_token is None:
+                            first_token = time.perf_counter() - start
+                        rewritten_resume += fragment
+                        rewrite_area.markdown(rewritten_resume)
+                except Exception as e:
+                    rewrite_area.markdown("_Rewrite unavailable._")
+                    st.warning(f"rewrite step failed: {e}")
+                if first_token is not None:
+                    st.caption(f"First text after {first_token:.2f}s, complete after {time.perf_counter() - start:.2f}s")
 
 
-                st.subheader("Keywords Missing from Your Resume:")
-                st.info(", ".join(missing))
+                result = analysis.result()
+                similarity_score = result["similarity"]
+                missing = result["keywords"] or []
+                final_score = result["score"] or 0
+                suggestions = result["suggestions"]
 
+                with results_area:
+                    for stage, error in result["errors"].items():
+                        st.warning(f"{stage} step failed: {error}")
 
-                st.subheader("AI-Powered Suggestions:")
-                st.markdown(suggestions)
+                    st.subheader(f"Overall Match Score: {final_score}%")
+                    st.progress(int(final_score))
 
 
-                st.subheader("Rewritten Resume Summary:")
-                st.markdown(rewritten_resume)
+                    st.subheader(f"Semantic Similarity with Job Description: {similarity_score}%")
 
-            else:
-                st.error("Could not extract text from the resume. Please try another file.")
 
-            # Clean up the temporary file
-            os.remove(uploaded_file.name)
+                    st.subheader("Keywords Missing from Your Resume:")
+                    st.info(", ".join(missing))
+
+
+                    st.subheader("AI-Powered Suggestions:")
+                    st.markdown(suggestions)
+
+            elif resume_text is not None:
+                st.error("Could not extract text from the resume. Please try another file.")
     else:
         st.warning("Please upload a resume and paste the job description.")
\ No newline at end of file
@@ -1,8 +1,20 @@
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
+from config import (
+    HF_API_BASE, HF_TIMEOUT, HF_RETRIES, HF_BACKOFF, HF_POOL_SIZE, HF_HEDGE_AFTER,
+    HF_BREAKER_THRESHOLD, HF_BREAKER_COOLDOWN,
+)
+from llm_cache import llm_cache
+from prompt_compactor import compact_pair, budget_for
+from metrics import timed, HF_RETRY_COUNT, HF_RESPONSES
+
 load_dotenv()
 
 HF_TOKEN = os.getenv("HUGGINGFACEHUB_API_TOKEN")
@@ -14,64 +26,184 @@ MODEL_CANDIDATES = [
     "google/flan-t5-small",
 ]
 
-MAX_CHARS = 4000
 MAX_NEW_TOKENS = 180
 
-def _clean(s: str) -> str:
-    s = (s or "").strip()
-    return s[:MAX_CHARS]
-
-def _post(model_id: str, payload: dict, retries: int = 3) -> requests.Response:
-    url = f"https://api-inference.huggingface.co/models/{model_id}"
-    backoff = 2.0
-    last = None
-    for i in range(retries):
-        r = requests.post(url, headers=HEADERS, json=payload, timeout=60)
-        if r.status_code == 200:
-            return r
-        # Free tier often returns 503 (loading) or 429 (rate limit) – backoff and retry
-        if r.status_code in (429, 503):
-            time.sleep(backoff * (i + 1))
-            last = r
+# Generic advice returned when no model answers; never cached or stored as a real result.
+FALLBACK_SUGGESTIONS = (
+    "- Add role-specific keywords from the JD\n"
+    "- Quantify achievements with numbers/percentages\n"
+    "- Improve section headings and bullet clarity"
+)
+
+# One keep-alive session for all calls, so retries and fallbacks reuse TLS connections.
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=HF_POOL_SIZE, pool_maxsize=HF_POOL_SIZE)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
+# Worker threads for hedged requests
+_hedge_executor = ThreadPoolExecutor(max_workers=HF_POOL_SIZE, thread_name_prefix="hf-hedge")
+
+
+class CircuitBreaker:
+    """
+    Skips models that keep failing. After `threshold` consecutive failures a model
+    is skipped for `cooldown` seconds, then gets one trial call (half-open).
+    """
+
+    def __init__(self, threshold=HF_BREAKER_THRESHOLD, cooldown=HF_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = {}
+        self._opened_at = {}
+        self._lock = threading.Lock()
+
+    def allow(self, model_id):
+        with self._lock:
+            opened_at = self._opened_at.get(model_id)
+            return opened_at is None or time.monotonic() - opened_at >= self.cooldown
+
+    def record_success(self, model_id):
+        with self._lock:
+            self._failures.pop(model_id, None)
+            self._opened_at.pop(model_id, None)
+
+    def record_failure(self, model_id):
+        with self._lock:
+            self._failures[model_id] = self._failures.get(model_id, 0) + 1
+            if self._failures[model_id] >= self.threshold:
+                self._opened_at[model_id] = time.monotonic()
+
+    def open_models(self):
+        return [m for m in list(self._opened_at) if not self.allow(m)]
+
+
+_breaker = CircuitBreaker()
+
+def breaker_states() -> dict:
+    """{model_id: 1 if its circuit is open, else 0} for every candidate model."""
+    open_models = set(_breaker.open_models())
+    return {m: int(m in open_models) for m in MODEL_CANDIDATES}
+
+def _post(model_id: str, payload: dict) -> requests.Response:
+    """A single inference call over the pooled session."""
+    url = f"{HF_API_BASE}/models/{model_id}"
+    with timed("hf_call"):
+        r = _session.post(url, headers=HEADERS, json=payload, timeout=HF_TIMEOUT)
+    HF_RESPONSES.inc(model=model_id, status=r.status_code)
+    return r
+
+def _retry_delay(r: requests.Response, attempt: int) -> float:
+    retry_after = r.headers.get("Retry-After", "")
+    if retry_after.replace(".", "", 1).isdigit():
+        return float(retry_after)
+    return HF_BACKOFF * (attempt + 1)
+
+def _parse_generated_text(data):
+    if isinstance(data, list) and data and isinstance(data[0], dict):
+        return (data[0].get("generated_text") or "").strip()
+    # some models return {"generated_text": "..."} directly
+    if isinstance(data, dict) and "generated_text" in data:
+        return (data["generated_text"] or "").strip()
+    return None
+
+def _run_schedule(models, payload: dict) -> str:
+    """
+    Walks the given models in preference order. A model that answers 429/503 is
+    re-queued after its backoff instead of blocking the thread, and the next model
+    is tried meanwhile; we only sleep when every remaining model is backing off.
+    Retries must start within HF_TIMEOUT of the first call: a model asking to wait
+    longer (e.g. Retry-After: 3600) counts as failed rather than parking the thread.
+    """
+    errors = []
+    deadline = time.monotonic() + HF_TIMEOUT
+    # (ready_at, preference, model, attempt)
+    queue = [(0.0, i, model, 0) for i, model in enumerate(models)]
+    while queue:
+        now = time.monotonic()
+        ready = [item for item in queue if item[0] <= now]
+        if not ready:
+            item = min(queue)
+            time.sleep(item[0] - now)
+        else:
+            item = min(ready, key=lambda q: q[1])
+        queue.remove(item)
+        _, preference, model, attempt = item
+
+        try:
+            r = _post(model, payload)
+        except requests.RequestException as e:
+            _breaker.record_failure(model)
+            errors.append(f"{model}: {type(e).__name__}")
             continue
-        # For other codes, return immediately
-        return r
-    return last or r
-
-def _call_hf_with_fallback(payload: dict) -> str:
-    if not HF_TOKEN:
-        raise RuntimeError("Missing HUGGINGFACEHUB_API_TOKEN in backend/.env")
 
-    errors = []
-    for model in MODEL_CANDIDATES:
-        r = _post(model, payload)
         if r.status_code == 200:
-            data = r.json()
-            if isinstance(data, list) and data and isinstance(data[0], dict):
-                return (data[0].get("generated_text") or "").strip()
-            # some models return {"generated_text": "..."} directly
-            if isinstance(data, dict) and "generated_text" in data:
-                return (data["generated_text"] or "").strip()
-            errors.append(f"{model}: unexpected payload {str(data)[:160]}")
+            text = _parse_generated_text(r.json())
+            if text is not None:
+                _breaker.record_success(model)
+                return text
+            errors.append(f"{model}: unexpected payload {r.text[:160]}")
             continue
 
-        if r.status_code == 404:
-            errors.append(f"{model}: 404 (model not found)")
-            continue
         if r.status_code in (401, 403):
             raise RuntimeError(f"AUTH_ERROR {r.status_code}: {r.text[:200]}")
+        # Free tier often returns 503 (loading) or 429 (rate limit) – retry later
         if r.status_code in (429, 503):
-            errors.append(f"{model}: {r.status_code} (loading/rate limit)")
+            retry_at = time.monotonic() + _retry_delay(r, attempt)
+            if attempt + 1 < HF_RETRIES and retry_at <= deadline:
+                HF_RETRY_COUNT.inc(model=model)
+                queue.append((retry_at, preference, model, attempt + 1))
+            else:
+                _breaker.record_failure(model)
+                reason = "loading/rate limit" if attempt + 1 >= HF_RETRIES else "retry later than the time budget"
+                errors.append(f"{model}: {r.status_code} ({reason})")
             continue
 
-        errors.append(f"{model}: {r.status_code} {r.text[:160]}")
-        continue
+        _breaker.record_failure(model)
+        if r.status_code == 404:
+            errors.append(f"{model}: 404 (model not found)")
+        else:
+            errors.append(f"{model}: {r.status_code} {r.text[:160]}")
+
+    raise RuntimeError("HF fallback failed: " + " | ".join(errors))
 
+def _run_hedged(models, payload: dict) -> str:
+    """
+    Starts the first model and, each time HF_HEDGE_AFTER seconds pass without an
+    answer, races the next one as well. The first successful response wins.
+    """
+    pending, errors = {}, []
+    remaining = list(models)
+    while remaining or pending:
+        if remaining:
+            model = remaining.pop(0)
+            pending[_hedge_executor.submit(_run_schedule, [model], payload)] = model
+        done, _ = wait(pending, timeout=HF_HEDGE_AFTER if remaining else None, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.pop(future)
+            try:
+                return future.result()
+            except RuntimeError as e:
+                if str(e).startswith("AUTH_ERROR"):
+                    raise
+                errors.append(str(e).replace("HF fallback failed: ", ""))
     raise RuntimeError("HF fallback failed: " + " | ".join(errors))
 
+def _call_hf_with_fallback(payload: dict) -> str:
+    if not HF_TOKEN:
+        raise RuntimeError("Missing HUGGINGFACEHUB_API_TOKEN in backend/.env")
+
+    models = [m for m in MODEL_CANDIDATES if _breaker.allow(m)]
+    if not models:
+        raise RuntimeError("HF fallback failed: circuit open for " + ", ".join(MODEL_CANDIDATES))
+
+    if HF_HEDGE_AFTER > 0 and len(models) > 1:
+        return _run_hedged(models, payload)
+    return _run_schedule(models, payload)
+
 def get_resume_suggestions(resume_text: str, jd_text: str) -> str:
-    resume_text = _clean(resume_text)
-    jd_text = _clean(jd_text)
+    # Keep the parts most relevant to the JD within what every candidate model can read
+    resume_text, jd_text, _ = compact_pair(resume_text, jd_text, budget_for(*MODEL_CANDIDATES), "suggestions")
 
     prompt = (
         "You are an ATS and hiring expert. Given the Resume and Job Description, "
@@ -92,18 +224,21 @@ def get_resume_suggestions(resume_text: str, jd_text: str) -> str:
         }
     }
 
+    # The fallback chain is part of the key: a different candidate list may answer differently
+    cache_model = "hf:" + ",".join(MODEL_CANDIDATES)
+    cached = llm_cache.get(cache_model, prompt, payload["parameters"])
+    if cached is not None:
+        return cached
+
     try:
         text = _call_hf_with_fallback(payload)
     except Exception as e:
         # Safe default if HF is unavailable
-        return (
-            "- Add role-specific keywords from the JD\n"
-            "- Quantify achievements with numbers/percentages\n"
-            "- Improve section headings and bullet clarity"
-        )
-
-    return text or (
-        "- Add role-specific keywords from the JD\n"
-        "- Quantify achievements with numbers/percentages\n"
-        "- Improve section headings and bullet clarity"
-    )
\ No newline at end of file
+        print(f"Backend: Suggestions fell back to generic advice: {e}")
+        return FALLBACK_SUGGESTIONS
+
+    if text:
+        # Only real model output is cached, never the fallback bullets
+        llm_cache.set(cache_model, prompt, payload["parameters"], text)
+
+    return text or FALLBACK_SUGGESTIONS
\ No newline at end of file
@@ -1,105 +1,463 @@
 # backend/api.py
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, redirect, Response, stream_with_context, g
 from flask_cors import CORS
-from models import db, Candidate, Resume, Job
-import io
-from fpdf import FPDF
-from docx import Document
-
-# --- Pre-load all AI models and analysis functions ---
-from jd_matcher import match_resume_to_jd
-from keyword_analyzer import missing_keywords
-from score_generator import generate_score
-from ai_suggester import get_resume_suggestions
-from resume_rewriter import rewrite_resume
+from models import db, Candidate, Resume, Job, StoredAnalysis, init_db, engine_options, load_resumes, load_jobs, content_hash
+import json
+import os
+import time
+
+# --- Analysis functions (heavy models and clients load lazily via model_registry) ---
+from jd_matcher import match_resumes_to_jd, encode_texts, embedding_cache_stats
+from keyword_index import ensure_resumes_indexed, job_terms, missing_keywords_for_job, keyword_coverage
+from scoring_engine import score_resumes
+from pipeline import run_analysis, STAGES
+from llm_cache import llm_cache
+from resume_rewriter import rewrite_resume_stream
+from task_queue import TaskQueue
+from job_matcher import rank_jobs_for_resume
+from export_cache import (
+    render_export, prerender_exports, wait_for_export, export_pending, MIMETYPES, FORMATS as EXPORT_FORMATS,
+)
+from ai_suggester import get_resume_suggestions, breaker_states
+import metrics
+from metrics import timed
+from resume_index import get_resume_index, sync_resume_index
+import model_registry
+from config import DATABASE_URI, RANK_DEFAULT_TOP_K, WARM_UP_MODELS, EXPORT_MAX_AGE, EXPORT_WAIT_TIMEOUT
 
 # --- App Configuration ---
 app = Flask(__name__)
 CORS(app)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///resumes.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URI
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(DATABASE_URI)
 db.init_app(app)
 
-# --- API Endpoints ---
-@app.route('/analyze', methods=['POST'])
-def analyze_resume_endpoint():
-    data = request.get_json()
-    resume_id = data.get('resume_id')
-    job_id = data.get('job_id')
+task_queue = TaskQueue()
 
-    # 1. Fetch data from the database
+def _row_id(value):
+    """Primary key from request JSON, which may send it as a string; None if it isn't an integer."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _exists(model, row_id):
+    # Primary-key lookup that never loads the text columns
+    return db.session.query(model.id).filter_by(id=row_id).first() is not None
+
+def _stored_analysis(resume_id, job_id, resume_hash, job_hash):
+    """The persisted result for this pair, if both texts are unchanged since it was stored."""
+    stored = StoredAnalysis.query.filter_by(resume_id=resume_id, job_id=job_id).first()
+    if stored and stored.resume_hash == resume_hash and stored.job_hash == job_hash:
+        return json.loads(stored.result)
+    return None
+
+def _store_analysis(resume_id, job_id, resume_hash, job_hash, result):
     with app.app_context():
+        stored = StoredAnalysis.query.filter_by(resume_id=resume_id, job_id=job_id).first()
+        if stored is None:
+            stored = StoredAnalysis(resume_id=resume_id, job_id=job_id)
+            db.session.add(stored)
+        stored.resume_hash, stored.job_hash = resume_hash, job_hash
+        stored.result = json.dumps(result)
+        try:
+            db.session.commit()
+        except Exception as e:
+            # A concurrent request stored the same pair first; its result is just as good
+            db.session.rollback()
+            print(f"Backend: Could not store analysis for resume {resume_id} / job {job_id}: {e}")
+
+def _stored_missing_keywords(resume_id, job_id):
+    """Missing keywords from the keyword index, exactly as /jobs/<id>/rank reports them."""
+    with app.app_context():
+        resume_obj, job_obj = db.session.get(Resume, resume_id), db.session.get(Job, job_id)
+        ensure_resumes_indexed([resume_obj])
+        return missing_keywords_for_job(job_obj, [resume_id])[resume_id]
+
+def _stored_score(resume_id, job_id, similarity):
+    """IDF-weighted score for a stored pair, the same one /jobs/<id>/rank computes."""
+    with app.app_context():
+        return score_resumes(job_terms(db.session.get(Job, job_id)), [resume_id], [similarity])[0]
+
+def _analyze_pair(resume_id, job_id, refresh=False):
+    """
+    Runs the full analysis for one pair; returns (response dict, HTTP status).
+    Results without stage errors are persisted and returned as-is while neither
+    text changes, unless `refresh` is set.
+    """
+    # 1. Fetch data from the database
+    with app.app_context(), timed("db_fetch"):
         # Using the newer Session.get() method to avoid warnings
-        resume_obj = db.session.get(Resume, resume_id)
-        job_obj = db.session.get(Job, job_id)
+        resume_obj = db.session.get(Resume, resume_id) if resume_id is not None else None
+        job_obj = db.session.get(Job, job_id) if job_id is not None else None
 
-    if not resume_obj or not job_obj:
-        return jsonify({"error": "Resume or Job not found in the database."}), 404
-        
-    resume_text = resume_obj.full_text
-    jd_text = job_obj.description
+        if not resume_obj or not job_obj:
+            return {"error": "Resume or Job not found in the database."}, 404
+        # The keyword index and scorer key their rows by the integer ids
+        resume_id, job_id = resume_obj.id, job_obj.id
+
+        resume_text = resume_obj.full_text
+        jd_text = job_obj.description
+        candidate_id = resume_obj.candidate_id
+        hashes = (content_hash(resume_text or ""), content_hash(jd_text or ""))
+        stored = None if refresh else _stored_analysis(resume_id, job_id, *hashes)
+
+    if stored is not None:
+        print("Backend: Returning stored analysis.")
+        recruiter_summary = stored["jobFitAnalysis"]["recruiterSummary"]
+        if recruiter_summary:
+            # Exports may have been evicted from the disk cache since the result was stored
+            stored["exports"] = _export_urls(recruiter_summary)
+        stored["stored"] = True
+        return stored, 200
     
-    # 2. Run your analysis functions
+    # 2. Run the analysis stages concurrently; failed stages come back as None + an error
     print("Backend: Starting analysis...")
-    similarity_score = match_resume_to_jd(resume_text, jd_text)
-    missing = missing_keywords(resume_text, jd_text)
-    final_score = generate_score(similarity_score, missing)
-    suggestions = get_resume_suggestions(resume_text, jd_text)
-    summary = rewrite_resume(resume_text, jd_text)
-    print("Backend: Analysis complete.")
+    # Keywords and score come from the stored index so they match /jobs/<id>/rank for the same pair
+    stages = {**STAGES, "keywords": lambda resume_text, jd_text: _stored_missing_keywords(resume_id, job_id)}
+    result = run_analysis(
+        resume_text, jd_text, stages,
+        scorer=lambda similarity, keywords: _stored_score(resume_id, job_id, similarity),
+    )
+    print("Backend: Analysis complete.", result["timings"])
 
     # 3. Structure and return the final JSON output
     analysis_result = {
         "jobId": job_id,
-        "candidateId": resume_obj.candidate_id,
+        "candidateId": candidate_id,
         "jobFitAnalysis": {
-            "matchScore": final_score,
-            "semanticSimilarity": similarity_score,
-            "missingKeywords": missing,
-            "recruiterSummary": summary,
+            "matchScore": result["score"],
+            "semanticSimilarity": result["similarity"],
+            "missingKeywords": result["keywords"],
+            "recruiterSummary": result["rewrite"],
             "resumeImprovements": {
-                "actionableAdvice": suggestions
+                "actionableAdvice": result["suggestions"]
             }
         },
+        "errors": result["errors"],
+        "timings": result["timings"],
     }
-    
-    return jsonify(analysis_result)
+    if result["rewrite"]:
+        # Render TXT/PDF/DOCX now so the download buttons are served from cache
+        analysis_result["exports"] = _export_urls(result["rewrite"])
+    if not result["errors"]:
+        _store_analysis(resume_id, job_id, *hashes, analysis_result)
+    return analysis_result, 200
 
-# --- Download Endpoints ---
-@app.route('/download/txt', methods=['POST'])
-def download_txt():
+def _run_task(resume_id, job_id):
+    result, status = _analyze_pair(resume_id, job_id)
+    if status != 200:
+        raise LookupError(result["error"])
+    return result
+
+# --- Metrics ---
+@app.before_request
+def _start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def _record_latency(response):
+    start = g.get('request_start')
+    if start is not None:
+        metrics.HTTP_SECONDS.observe(
+            time.perf_counter() - start,
+            endpoint=request.url_rule.rule if request.url_rule else "unmatched",
+            status=response.status_code,
+        )
+    return response
+
+@metrics.register_collector
+def _cache_metrics():
+    embeddings, llm = embedding_cache_stats(), llm_cache.stats()
+    lines = metrics.sample_lines(
+        "resume_optimizer_embedding_cache_lookups_total", "Embedding cache lookups by outcome.",
+        {"memory_hit": embeddings["memoryHits"], "disk_hit": embeddings["diskHits"], "miss": embeddings["misses"]},
+        "outcome", kind="counter",
+    )
+    lines += metrics.sample_lines(
+        "resume_optimizer_llm_cache_lookups_total", "LLM response cache lookups by outcome.",
+        {"hit": llm["hits"], "miss": llm["misses"]}, "outcome", kind="counter",
+    )
+    lines += metrics.sample_lines(
+        "resume_optimizer_cache_hit_ratio", "Hit ratio per cache.",
+        {"embeddings": embeddings["hitRate"], "llm": llm["hitRate"]}, "cache",
+    )
+    lines += metrics.sample_lines(
+        "resume_optimizer_hf_circuit_open", "1 while a model's circuit breaker is open.",
+        breaker_states(), "model",
+    )
+    return lines
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# --- API Endpoints ---
+@app.route('/analyze', methods=['POST'])
+def analyze_resume_endpoint():
     data = request.get_json()
-    resume_text = data.get('text', '')
-    buffer = io.BytesIO(resume_text.encode('utf-8'))
-    buffer.seek(0)
-    return send_file(buffer, as_attachment=True, download_name='Optimized_Resume.txt', mimetype='text/plain')
+    resume_id, job_id = _row_id(data.get('resume_id')), _row_id(data.get('job_id'))
+    result, status = _analyze_pair(resume_id, job_id, bool(data.get('refresh')))
+    return jsonify(result), status
 
-@app.route('/download/pdf', methods=['POST'])
-def download_pdf():
+@app.route('/analyze/async', methods=['POST'])
+def submit_analysis_endpoint():
+    """Queues an analysis and returns its task id right away; poll /analyze/tasks/<id> for the result."""
     data = request.get_json()
-    resume_text = data.get('text', '')
-    
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", size=11)
-    pdf.multi_cell(0, 5, resume_text.encode('latin-1', 'replace').decode('latin-1'))
-    
-    buffer = io.BytesIO(pdf.output(dest='S').encode('latin-1'))
-    return send_file(buffer, as_attachment=True, download_name='Optimized_Resume.pdf', mimetype='application/pdf')
+    resume_id, job_id = _row_id(data.get('resume_id')), _row_id(data.get('job_id'))
+    if not _exists(Resume, resume_id) or not _exists(Job, job_id):
+        return jsonify({"error": "Resume or Job not found in the database."}), 404
 
-@app.route('/download/docx', methods=['POST'])
-def download_docx():
+    # No-op once the workers run; starts them when the app is served without __main__ (e.g. a WSGI server)
+    task_queue.start_workers(_run_task)
+    task_id, created = task_queue.submit(resume_id, job_id)
+    return jsonify({"taskId": task_id, "deduplicated": not created, "statusUrl": f"/analyze/tasks/{task_id}"}), 202
+
+@app.route('/analyze/tasks/<task_id>', methods=['GET'])
+def analysis_task_endpoint(task_id):
+    task = task_queue.get(task_id)
+    if not task:
+        return jsonify({"error": "Task not found."}), 404
+    response = {"taskId": task_id, "status": task["status"]}
+    if task["result"] is not None:
+        response["result"] = task["result"]
+    if task["error"]:
+        response["error"] = task["error"]
+    return jsonify(response)
+
+@app.route('/rewrite/stream', methods=['POST'])
+def rewrite_stream_endpoint():
+    """
+    Streams the optimized resume as server-sent events: one `token` event per
+    fragment, then a `done` event with time-to-first-byte and total latency.
+    """
     data = request.get_json()
-    resume_text = data.get('text', '')
-    
-    doc = Document()
-    doc.add_paragraph(resume_text)
-    
-    buffer = io.BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return send_file(buffer, as_attachment=True, download_name='Optimized_Resume.docx', mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document')
+    resume_obj = db.session.get(Resume, data.get('resume_id'))
+    job_obj = db.session.get(Job, data.get('job_id'))
+    if not resume_obj or not job_obj:
+        return jsonify({"error": "Resume or Job not found in the database."}), 404
+    resume_text, jd_text = resume_obj.full_text, job_obj.description
+
+    def _sse(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    def generate():
+        start = time.perf_counter()
+        first = None
+        parts = []
+        try:
+            for fragment in rewrite_resume_stream(resume_text, jd_text):
+                if first is None:
+                    first = time.perf_counter() - start
+                parts.append(fragment)
+                yield _sse("token", {"text": fragment})
+        except Exception as e:
+            parts = []
+            yield _sse("error", {"error": str(e)})
+        total = time.perf_counter() - start
+        print(f"Backend: Rewrite stream TTFB {first if first is not None else total:.2f}s, total {total:.2f}s")
+        done = {
+            "ttfbMs": round((first if first is not None else total) * 1000, 1),
+            "totalMs": round(total * 1000, 1),
+        }
+        rewritten = "".join(parts).strip()
+        if rewritten:
+            done["exports"] = _export_urls(rewritten)
+        yield _sse("done", done)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def _id_list(arg):
+    # "?ids=1,2,3" -> [1, 2, 3]; None when the parameter is absent
+    raw = request.args.get(arg)
+    return None if raw is None else [int(i) for i in raw.split(",") if i.strip().isdigit()]
+
+@app.route('/resumes', methods=['GET'])
+def list_resumes_endpoint():
+    """Resume metadata in one query (`?ids=` to select, `?text=1` to include full text)."""
+    with_text = request.args.get('text', default=0, type=int) == 1
+    return jsonify({"resumes": [
+        {"resumeId": r.id, "candidateId": r.candidate_id, "contentHash": r.content_hash,
+         **({"fullText": r.full_text} if with_text else {})}
+        for r in load_resumes(_id_list('ids'), with_text)
+    ]})
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs_endpoint():
+    """Job metadata in one query (`?ids=` to select, `?text=1` to include descriptions)."""
+    with_text = request.args.get('text', default=0, type=int) == 1
+    return jsonify({"jobs": [
+        {"jobId": j.id, "title": j.title, "contentHash": j.content_hash,
+         **({"description": j.description} if with_text else {})}
+        for j in load_jobs(_id_list('ids'), with_text)
+    ]})
+
+def _job_rows():
+    # Only the columns matching needs, for every stored job
+    return db.session.query(Job.id, Job.title, Job.description).all()
+
+@app.route('/resumes/<int:resume_id>/jobs', methods=['GET'])
+def resume_jobs_endpoint(resume_id):
+    """Ranks every stored job for one stored resume."""
+    top_k = request.args.get('top_k', default=RANK_DEFAULT_TOP_K, type=int)
+    resume_obj = db.session.get(Resume, resume_id)
+    if not resume_obj:
+        return jsonify({"error": "Resume not found in the database."}), 404
+    matches = rank_jobs_for_resume(resume_obj.full_text or "", _job_rows(), top_k)
+    return jsonify({"resumeId": resume_id, "matches": matches})
+
+@app.route('/match/jobs', methods=['POST'])
+def match_jobs_endpoint():
+    """Ranks every stored job for an uploaded resume text ({"resume_text": ..., "top_k": ...})."""
+    data = request.get_json()
+    resume_text = (data.get('resume_text') or "").strip()
+    if not resume_text:
+        return jsonify({"error": "resume_text is required."}), 400
+    try:
+        top_k = int(data.get('top_k', RANK_DEFAULT_TOP_K))
+    except (TypeError, ValueError):
+        return jsonify({"error": "top_k must be an integer."}), 400
+    matches = rank_jobs_for_resume(resume_text, _job_rows(), top_k)
+    return jsonify({"matches": matches})
+
+@app.route('/match/jobs/<int:job_id>/suggestions', methods=['POST'])
+def match_job_suggestions_endpoint(job_id):
+    """LLM suggestions for one resume/job pair, requested only when the user opens that job."""
+    data = request.get_json()
+    resume_text = (data.get('resume_text') or "").strip()
+    job_obj = db.session.get(Job, job_id)
+    if not job_obj or not resume_text:
+        return jsonify({"error": "Job not found or resume_text missing."}), 404
+    return jsonify({"jobId": job_id, "suggestions": get_resume_suggestions(resume_text, job_obj.description)})
+
+@app.route('/jobs/<int:job_id>/rank', methods=['GET'])
+def rank_resumes_endpoint(job_id):
+    top_k = request.args.get('top_k', default=RANK_DEFAULT_TOP_K, type=int)
+
+    # 1. Fetch the job and the whole applicant pool in one query each
+    job_obj = db.session.get(Job, job_id)
+    if not job_obj:
+        return jsonify({"error": "Job not found in the database."}), 404
+    resumes = Resume.query.all()
+    if not resumes:
+        return jsonify({"jobId": job_id, "rankings": []})
+
+    # 2. Batched encoding + one matrix product; missing keywords come from the keyword index
+    resume_texts = [r.full_text or "" for r in resumes]
+    similarities = match_resumes_to_jd(resume_texts, job_obj.description)
+    ensure_resumes_indexed(resumes)
+    resume_ids = [r.id for r in resumes]
+    terms = job_terms(job_obj)
+    missing_by_id = missing_keywords_for_job(job_obj, resume_ids, terms)
+    # Missing keywords are weighted by IDF over the stored corpus instead of a flat 1.5 points each
+    scores = score_resumes(terms, resume_ids, similarities)
+
+    rankings = []
+    for resume_obj, similarity_score, score in zip(resumes, similarities, scores):
+        rankings.append({
+            "resumeId": resume_obj.id,
+            "candidateId": resume_obj.candidate_id,
+            "matchScore": score,
+            "semanticSimilarity": similarity_score,
+            "missingKeywords": missing_by_id[resume_obj.id],
+        })
+    rankings.sort(key=lambda r: (r["matchScore"], r["semanticSimilarity"]), reverse=True)
+
+    return jsonify({"jobId": job_id, "rankings": rankings[:max(top_k, 0)]})
+
+@app.route('/jobs/<int:job_id>/keyword-coverage', methods=['GET'])
+def keyword_coverage_endpoint(job_id):
+    top_k = request.args.get('top_k', default=RANK_DEFAULT_TOP_K, type=int)
+
+    job_obj = db.session.get(Job, job_id)
+    if not job_obj:
+        return jsonify({"error": "Job not found in the database."}), 404
+
+    coverage = keyword_coverage(job_obj)
+    best = sorted(coverage.items(), key=lambda item: item[1], reverse=True)[:max(top_k, 0)]
+    return jsonify({
+        "jobId": job_id,
+        "resumes": [{"resumeId": rid, "keywordCoverage": round(c * 100, 2)} for rid, c in best],
+    })
+
+@app.route('/jobs/<int:job_id>/candidates', methods=['GET'])
+def job_candidates_endpoint(job_id):
+    top_k = request.args.get('top_k', default=RANK_DEFAULT_TOP_K, type=int)
+
+    job_obj = db.session.get(Job, job_id)
+    if not job_obj:
+        return jsonify({"error": "Job not found in the database."}), 404
+
+    # Picks up resumes added since the index was last written (all of them on first use)
+    sync_resume_index()
+    index = get_resume_index()
+
+    jd_embedding = encode_texts([job_obj.description])[0]
+    candidates = [
+        {"resumeId": resume_id, "semanticSimilarity": round(score * 100, 2)}
+        for resume_id, score in index.search(jd_embedding, top_k)
+    ]
+    return jsonify({"jobId": job_id, "candidates": candidates})
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats_endpoint():
+    return jsonify({"embeddings": embedding_cache_stats(), "llm": llm_cache.stats()})
+
+# --- Download Endpoints ---
+def _send_export(path, content_id, fmt):
+    """Serves a rendered export with an ETag, so conditional GETs can be answered with 304."""
+    return send_file(
+        path, as_attachment=True, download_name=f'Optimized_Resume.{fmt}', mimetype=MIMETYPES[fmt],
+        etag=f"{content_id}-{fmt}", conditional=True, max_age=EXPORT_MAX_AGE,
+    )
+
+def _export_urls(text):
+    """Starts background rendering of every format and returns their download URLs."""
+    content_id = prerender_exports(text)
+    return {fmt: f"/exports/{content_id}.{fmt}" for fmt in EXPORT_FORMATS}
+
+@app.route('/download/<fmt>', methods=['POST'])
+def download_export(fmt):
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Unsupported format {fmt}."}), 404
+    data = request.get_json()
+    # Rendered (or reused) here, then served by the cacheable GET URL, which answers repeats with 304
+    _, content_id = render_export(data.get('text', ''), fmt)
+    return redirect(f"/exports/{content_id}.{fmt}", code=303)
+
+@app.route('/exports/<content_id>.<fmt>', methods=['GET'])
+def cached_export(content_id, fmt):
+    """
+    Conditional GET for a rendered export. One still rendering in the background
+    is waited for up to EXPORT_WAIT_TIMEOUT seconds, then answered with 202.
+    """
+    if fmt not in EXPORT_FORMATS or not content_id.isalnum():
+        return jsonify({"error": "Export not found."}), 404
+    path = wait_for_export(content_id, fmt, EXPORT_WAIT_TIMEOUT)
+    if path is None:
+        if export_pending(content_id, fmt):
+            response = jsonify({"status": "rendering", "exportUrl": f"/exports/{content_id}.{fmt}"})
+            response.headers["Retry-After"] = "1"
+            return response, 202
+        return jsonify({"error": "Export not found."}), 404
+    return _send_export(path, content_id, fmt)
+
+def warm_up():
+    """Loads the configured models/clients up front so the first request doesn't pay for them."""
+    if not WARM_UP_MODELS:
+        return {}
+    names = None if WARM_UP_MODELS == "all" else [n.strip() for n in WARM_UP_MODELS.split(",") if n.strip()]
+    load_times = model_registry.warm_up(names)
+    print("Backend: Warm-up complete:", {k: round(v, 2) for k, v in load_times.items()})
+    return load_times
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
+        init_db()
+    warm_up()
+    # Workers start with the server so tasks queued before a restart run without a new submit.
+    # With the debug reloader only the serving child process runs them.
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        task_queue.start_workers(_run_task)
     app.run(debug=True)
\ No newline at end of file
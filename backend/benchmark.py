@@ -0,0 +1,741 @@
+# backend/benchmark.py
+"""
+Manual benchmarks for the analysis pipeline.
+
+Usage (from the backend folder):
+    python benchmark.py chunking
+    python benchmark.py startup
+    python benchmark.py keywords --resumes 10000
+    python benchmark.py pipeline --repeat 50 --output results.json
+    python benchmark.py backends
+    python benchmark.py index --vectors 20000
+    python benchmark.py hf
+    python benchmark.py linkedin --profiles 20
+
+`pipeline` is the regression suite: it runs against throwaway caches and a
+throwaway database, with the Groq and Hugging Face clients replaced by local
+stubs, and reports throughput and p50/p95/p99 latency per operation.
+
+Benchmarks that check a quality bar (index recall, backend score drift, the
+HF client's retry/fallback behaviour, LinkedIn parsing and caching) list what fell short under "failures"
+and exit with status 1.
+
+Only the JSON results go to stdout (`python benchmark.py pipeline > results.json`
+works); the backend's own log lines are sent to stderr.
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import random
+import statistics
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+WORDS = (
+    "python sql tableau dashboards stakeholders pipeline analysis forecasting etl "
+    "reporting visualization regression cleaning insights kpis excel warehouse "
+    "modeling automation experiments metrics"
+).split()
+
+
+def synthetic_resume(n_words, seed=0):
+    """A resume-shaped text with section headers and sentence-sized lines; every seed gives its own text."""
+    # random.Random(-n) is seeded like random.Random(n); a string seed keeps negative seeds distinct
+    rng = random.Random(f"synthetic-resume-{seed}")
+    sections = ["Summary", "Experience", "Projects", "Technical Skills", "Education"]
+    lines, per_section = [], max(n_words // len(sections), 1)
+    for section in sections:
+        lines.append(section)
+        written = 0
+        while written < per_section:
+            sentence = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+            lines.append(" ".join(sentence).capitalize() + ".")
+            written += len(sentence)
+    return "\n".join(lines)
+
+
+def _percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return None
+    rank = max(int(round(pct / 100 * len(sorted_samples) + 0.5)) - 1, 0)
+    return sorted_samples[min(rank, len(sorted_samples) - 1)]
+
+
+def summarize(samples_ms):
+    ordered = sorted(samples_ms)
+    total_s = sum(ordered) / 1000
+    return {
+        "runs": len(ordered),
+        "p50Ms": round(_percentile(ordered, 50), 3),
+        "p95Ms": round(_percentile(ordered, 95), 3),
+        "p99Ms": round(_percentile(ordered, 99), 3),
+        "meanMs": round(statistics.fmean(ordered), 3),
+        "opsPerSecond": round(len(ordered) / total_s, 2) if total_s else None,
+    }
+
+
+def _timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def bench_chunking(args):
+    import jd_matcher
+
+    results = {}
+    jd_text = synthetic_resume(120, seed=99)
+    for n_words in (150, 600, 1500):
+        for m, mode in enumerate(jd_matcher.CHUNK_MODES):
+            seeds = range(m * 10000 + n_words, m * 10000 + n_words + args.repeat)
+            resumes = [synthetic_resume(n_words, seed=s) for s in seeds]
+            # Fresh texts each run so the embedding cache does not hide encode cost
+            it = iter(resumes)
+            samples = _timed(lambda: jd_matcher.match_resume_to_jd(next(it), jd_text, mode), args.repeat)
+            results[f"{n_words}w/{mode}"] = {"medianMs": round(statistics.median(samples), 2)}
+    return results
+
+
+# Each snippet runs in a fresh interpreter and prints {"importS": ..., "firstRequestS": ...}.
+STARTUP_SNIPPETS = {
+    "api": """
+import time, json
+t = time.perf_counter(); import api; imported = time.perf_counter()
+client = api.app.test_client()
+client.post('/download/txt', json={'text': 'hello'})
+print(json.dumps({'importS': imported - t, 'firstRequestS': time.perf_counter() - imported}))
+""",
+    "api_download_pdf": """
+import time, json
+t = time.perf_counter(); import api; imported = time.perf_counter()
+client = api.app.test_client()
+client.post('/download/pdf', json={'text': 'hello'})
+print(json.dumps({'importS': imported - t, 'firstRequestS': time.perf_counter() - imported}))
+""",
+    "seed_db": """
+import time, json
+t = time.perf_counter(); import seed_db
+print(json.dumps({'importS': time.perf_counter() - t, 'firstRequestS': None}))
+""",
+    # The modules app.py imports; the Streamlit script itself cannot run headless.
+    "app_modules": """
+import time, json
+t = time.perf_counter()
+import resume_parser, jd_matcher, keyword_analyzer, score_generator, ai_suggester, resume_rewriter
+imported = time.perf_counter()
+jd_matcher.match_resume_to_jd('Python and SQL analyst', 'Data analyst with SQL')
+print(json.dumps({'importS': imported - t, 'firstRequestS': time.perf_counter() - imported}))
+""",
+}
+
+
+def bench_startup(args):
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    for name, snippet in STARTUP_SNIPPETS.items():
+        runs = []
+        for _ in range(args.repeat):
+            out = subprocess.run([sys.executable, "-c", snippet], cwd=here, capture_output=True, text=True)
+            if out.returncode != 0:
+                runs = None
+                results[name] = {"error": out.stderr.strip().splitlines()[-1:]}
+                break
+            runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        if runs:
+            first = [r["firstRequestS"] for r in runs if r["firstRequestS"] is not None]
+            results[name] = {
+                "importMedianS": round(statistics.median(r["importS"] for r in runs), 3),
+                "firstRequestMedianS": round(statistics.median(first), 3) if first else None,
+            }
+    return results
+
+
+def bench_keywords(args):
+    """Missing keywords for one JD across a pool: per-request regex sets vs the stored keyword index."""
+    from flask import Flask
+    from models import db, Resume, Job
+    from keyword_analyzer import missing_keywords
+    from keyword_index import index_resume_keywords, index_job_keywords, missing_keywords_for_job, keyword_coverage
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    resume_texts = [synthetic_resume(400, seed=i) for i in range(args.resumes)]
+    jd_text = synthetic_resume(150, seed=-1)
+
+    with app.app_context():
+        db.create_all()
+        resumes = [Resume(full_text=t) for t in resume_texts]
+        job = Job(title="Benchmark", description=jd_text)
+        db.session.add_all(resumes + [job])
+        db.session.flush()
+        start = time.perf_counter()
+        index_resume_keywords(resumes)
+        index_job_keywords([job])
+        db.session.commit()
+        ingest_s = time.perf_counter() - start
+        ids = [r.id for r in resumes]
+
+        regex_ms = _timed(lambda: [missing_keywords(t, jd_text) for t in resume_texts], args.repeat)
+        index_ms = _timed(lambda: missing_keywords_for_job(job, ids), args.repeat)
+        coverage_ms = _timed(lambda: keyword_coverage(job), args.repeat)
+
+    return {
+        "resumes": args.resumes,
+        "indexBuildS": round(ingest_s, 2),
+        "regexMissingMedianMs": round(statistics.median(regex_ms), 2),
+        "indexMissingMedianMs": round(statistics.median(index_ms), 2),
+        "indexCoverageMedianMs": round(statistics.median(coverage_ms), 2),
+    }
+
+
+# Loads one embedding backend in a fresh interpreter, encodes the texts and reports time, RSS and scores.
+BACKEND_SNIPPET = """
+import json, resource, sys, time
+import numpy as np
+from embedding_backends import load_backend
+texts = json.loads(sys.stdin.read())
+start = time.perf_counter(); backend = load_backend(sys.argv[1], sys.argv[2]); loaded = time.perf_counter()
+backend.encode(texts[:2])  # warm-up
+runs = []
+for _ in range(int(sys.argv[3])):
+    t = time.perf_counter(); emb = backend.encode(texts); runs.append((time.perf_counter() - t) * 1000)
+emb = emb / np.linalg.norm(emb, axis=1, keepdims=True)
+jd, resumes = emb[0], emb[1:]
+print(json.dumps({
+    "backend": type(backend).__name__, "loadS": loaded - start, "encodeRunsMs": runs,
+    "maxRssMb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "scores": [float(s) * 100 for s in resumes @ jd],
+}))
+"""
+
+# Largest allowed match-score difference (percentage points) between a backend and PyTorch.
+BACKEND_SCORE_TOLERANCE = 2.0
+
+
+def bench_backends(args):
+    """PyTorch vs int8 ONNX: encode latency, peak RSS and how far match scores drift."""
+    from config import EMBEDDING_MODEL_NAME
+    from embedding_backends import BACKENDS
+
+    texts = [synthetic_resume(120, seed=-1)] + [synthetic_resume(300, seed=i) for i in range(32)]
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    for backend in BACKENDS:
+        out = subprocess.run(
+            [sys.executable, "-c", BACKEND_SNIPPET, EMBEDDING_MODEL_NAME, backend, str(args.repeat)],
+            cwd=here, input=json.dumps(texts), capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            results[backend] = {"error": out.stderr.strip().splitlines()[-1:]}
+            continue
+        data = json.loads(out.stdout.strip().splitlines()[-1])
+        results[backend] = {
+            "loadedAs": data["backend"],
+            "loadS": round(data["loadS"], 2),
+            "encode": summarize(data["encodeRunsMs"]),
+            "maxRssMb": round(data["maxRssMb"], 1),
+            "scores": data["scores"],
+        }
+
+    baseline = results.get("sentence-transformers", {}).get("scores")
+    failures = []
+    for backend, result in results.items():
+        scores = result.pop("scores", None)
+        if baseline and scores and backend != "sentence-transformers":
+            drift = max(abs(a - b) for a, b in zip(scores, baseline))
+            result["maxScoreDiff"] = round(drift, 3)
+            result["withinTolerance"] = drift <= BACKEND_SCORE_TOLERANCE
+            if not result["withinTolerance"]:
+                failures.append(f"{backend}: match scores drift {drift:.3f} points from PyTorch (tolerance {BACKEND_SCORE_TOLERANCE})")
+    results["failures"] = failures
+    return results
+
+
+def bench_index(args):
+    """
+    Recall@k against exact search on clustered vectors, with query latency: the
+    NumPy IVF index per nprobe, and the FAISS HNSW index (used instead when FAISS
+    is installed) per efSearch.
+    """
+    import numpy as np
+    from config import RESUME_INDEX_MIN_TRAIN, RESUME_INDEX_NPROBE, RESUME_INDEX_EF_SEARCH
+    from resume_index import ResumeIndex, faiss
+
+    rng = np.random.default_rng(0)
+    n, dim, n_clusters, k = max(args.vectors, 2 * RESUME_INDEX_MIN_TRAIN), 384, 64, 10
+    # Resume embeddings are clustered by role/skill set; uniform random vectors would flatter nothing
+    centers = rng.normal(size=(n_clusters, dim))
+    vectors = centers[rng.integers(n_clusters, size=n)] + 1.5 * rng.normal(size=(n, dim))
+    queries = centers[rng.integers(n_clusters, size=100)] + 1.5 * rng.normal(size=(100, dim))
+
+    index = ResumeIndex(path=None, use_faiss=False)
+    start = time.perf_counter()
+    index.add(np.arange(n), vectors, save=False)
+    results = {"vectors": n, "k": k, "buildS": round(time.perf_counter() - start, 2), "clusters": len(index.centroids)}
+
+    it = itertools.cycle(queries)
+    results["exact"] = summarize(_timed(lambda: index.exact_search(next(it), k), len(queries)))
+    failures = []
+    for nprobe in sorted({1, 2, 4, RESUME_INDEX_NPROBE, 16, 32}):
+        recall = index.recall_at_k(queries, k, nprobe)
+        results[f"nprobe={nprobe}"] = {
+            "recallAtK": round(recall, 4),
+            "query": summarize(_timed(lambda: index.search(next(it), k, nprobe), len(queries))),
+        }
+        if nprobe == RESUME_INDEX_NPROBE and recall < args.min_recall:
+            failures.append(f"recall@{k} {recall:.3f} < {args.min_recall} at the configured nprobe={nprobe}")
+
+    if faiss is None:
+        results["faiss"] = "not installed"
+    else:
+        hnsw = ResumeIndex(path=None, use_faiss=True)
+        start = time.perf_counter()
+        hnsw.add(np.arange(n), vectors, save=False)
+        results["faiss"] = {"buildS": round(time.perf_counter() - start, 2)}
+        for ef in sorted({16, 32, RESUME_INDEX_EF_SEARCH, 128}):
+            recall = hnsw.recall_at_k(queries, k, ef_search=ef)
+            results["faiss"][f"efSearch={ef}"] = {
+                "recallAtK": round(recall, 4),
+                "query": summarize(_timed(lambda: hnsw.search(next(it), k, ef_search=ef), len(queries))),
+            }
+            if ef == RESUME_INDEX_EF_SEARCH and recall < args.min_recall:
+                failures.append(f"FAISS recall@{k} {recall:.3f} < {args.min_recall} at the configured efSearch={ef}")
+    results["failures"] = failures
+    return results
+
+
+# --- Local stubs for the remote LLMs ---
+
+def start_scripted_stub(scripts, default=((404, 0, {}, {"error": "not found"}),)):
+    """
+    Local HTTP server answering GET and POST by path from `scripts`:
+    {path: [(status, delay_s, headers, body), ...]}, one reply per request with the
+    last one repeating; unscripted paths get `default`. `body` is bytes, str or
+    anything JSON-serializable. Returns (server, base URL, calls), where calls
+    lists (path, monotonic time) per request in arrival order.
+    """
+    calls, lock = [], threading.Lock()
+    scripts = {path: list(replies) for path, replies in scripts.items()}
+    default = list(default)
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with lock:
+                calls.append((self.path, time.monotonic()))
+                script = scripts.get(self.path, default)
+                status, delay, headers, body = script.pop(0) if len(script) > 1 else script[0]
+            time.sleep(delay)
+            if isinstance(body, str):
+                body = body.encode()
+            elif not isinstance(body, bytes):
+                body = json.dumps(body).encode()
+            self.send_response(status)
+            for name, value in {"Content-Type": "application/json", **headers}.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = do_POST = _reply
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}", calls
+
+
+def hf_replies(model, steps):
+    """Stub replies for one HF model from (status, delay_s, headers) steps; a 200 answers "from <model>"."""
+    return [
+        (status, delay, headers, [{"generated_text": f"from {model}"}] if status == 200 else {"error": f"status {status}"})
+        for status, delay, headers in steps
+    ]
+
+
+def bench_hf(args):
+    """Scripted 200/404/429/503/500 responses: retries, fallback order, Retry-After, breaker and hedging."""
+    os.environ.update({"HF_BACKOFF": "0.05", "HF_RETRIES": "3"})
+    import ai_suggester
+    from metrics import HF_RETRY_COUNT
+
+    A, B = "stub/model-a", "stub/model-b"
+    ok, slow = (200, 0, {}), (200, 1.0, {})
+    scenarios = {
+        # name: (scripts, calls to make, hedge_after)
+        "retry_503_then_success": ({A: [(503, 0, {}), ok], B: [(503, 0, {})]}, 1, 0),
+        "fallback_after_404": ({A: [(404, 0, {})], B: [ok]}, 1, 0),
+        "retry_after_429": ({A: [(429, 0, {"Retry-After": "0.3"}), ok], B: [(404, 0, {})]}, 1, 0),
+        "retry_after_beyond_budget": ({A: [(429, 0, {"Retry-After": "3600"}), ok], B: [(404, 0, {})]}, 1, 0),
+        "breaker_opens": ({A: [(500, 0, {})], B: [ok]}, 3, 0),
+        "hedged_slow_first_model": ({A: [slow], B: [ok]}, 1, 0.2),
+    }
+    results, failures = {}, []
+
+    def check(name, condition, message):
+        if not condition:
+            failures.append(f"{name}: {message}")
+
+    for name, (scripts, n_calls, hedge_after) in scenarios.items():
+        server, url, calls = start_scripted_stub(
+            {f"/models/{model}": hf_replies(model, steps) for model, steps in scripts.items()}
+        )
+        ai_suggester.HF_API_BASE = url
+        ai_suggester.HF_TOKEN = "benchmark"
+        ai_suggester.HF_HEDGE_AFTER = hedge_after
+        ai_suggester.MODEL_CANDIDATES = [A, B]
+        ai_suggester._breaker = ai_suggester.CircuitBreaker(threshold=2, cooldown=60)
+        retries_before = HF_RETRY_COUNT._values.get((A,), 0)
+        answers, start = [], time.monotonic()
+        for _ in range(n_calls):
+            try:
+                answers.append(ai_suggester._call_hf_with_fallback({"inputs": "x", "parameters": {}}))
+            except RuntimeError as e:
+                answers.append(f"error: {e}")
+        elapsed = time.monotonic() - start
+        server.shutdown()
+        calls = [(path.split("/models/", 1)[-1], t) for path, t in calls]
+        order = [model for model, _ in calls]
+        results[name] = {
+            "answers": answers, "calls": order, "seconds": round(elapsed, 3),
+            "retries": HF_RETRY_COUNT._values.get((A,), 0) - retries_before,
+            "openBreakers": ai_suggester._breaker.open_models(),
+        }
+
+        if name == "retry_503_then_success":
+            check(name, answers == [f"from {A}"], f"answered {answers}")
+            check(name, order.count(A) == 2, f"calls {order}")
+            check(name, results[name]["retries"] == 1, f"{results[name]['retries']} retries counted")
+        elif name == "fallback_after_404":
+            check(name, order == [A, B] and answers == [f"from {B}"], f"calls {order}, answered {answers}")
+        elif name == "retry_after_429":
+            a_times = [t for model, t in calls if model == A]
+            check(name, answers == [f"from {A}"], f"answered {answers}")
+            check(name, order[:2] == [A, B], f"B not tried while A was backing off: {order}")
+            check(name, len(a_times) == 2 and a_times[1] - a_times[0] >= 0.3,
+                  "A retried before its Retry-After of 0.3s")
+        elif name == "retry_after_beyond_budget":
+            check(name, order == [A, B] and answers[0].startswith("error:") and elapsed < 1.0,
+                  f"calls {order}, answered {answers} after {elapsed:.2f}s")
+        elif name == "breaker_opens":
+            check(name, order == [A, B, A, B, B], f"calls {order}")
+            check(name, results[name]["openBreakers"] == [A], f"open breakers {results[name]['openBreakers']}")
+            check(name, ai_suggester.breaker_states() == {A: 1, B: 0}, f"breaker states {ai_suggester.breaker_states()}")
+        elif name == "hedged_slow_first_model":
+            check(name, answers == [f"from {B}"] and elapsed < 1.0, f"answered {answers} after {elapsed:.2f}s")
+
+    results["failures"] = failures
+    return results
+
+
+PROFILE_FIXTURE = """<html><head><meta property="og:title" content="Profile {n}"></head><body>
+<h1>Candidate {n}</h1><div class="top-card-layout__headline">Data Analyst</div>
+<section class="core-section-container experience"><h2>Experience</h2><ul>
+<li><h3>Data Analyst</h3><p>Built {words} dashboards</p></li>
+<li><h3>Junior Analyst</h3><p>Automated {words} reporting</p></li>
+</ul></section>
+<section data-section="skills"><h2>Skills</h2><ul><li>Python</li><li>SQL</li><li>Tableau</li></ul></section>
+</body></html>"""
+HTML = {"Content-Type": "text/html; charset=utf-8"}
+
+
+class StubGroq:
+    """Mimics groq.Groq().chat.completions.create for plain and streamed calls."""
+
+    def __init__(self, latency_s, tokens=200):
+        self.latency_s, self.tokens = latency_s, tokens
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, messages, model, stream=False, **params):
+        words = ["Optimized"] + messages[-1]["content"].split()[:self.tokens - 1]
+        if not stream:
+            time.sleep(self.latency_s)
+            message = SimpleNamespace(content=" ".join(words))
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+        return self._stream(words)
+
+    def _stream(self, words):
+        per_token = self.latency_s / max(len(words), 1)
+        for word in words:
+            time.sleep(per_token)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word + " "))])
+
+
+def _write_resume_files(folder, text, name):
+    """Writes the same text as PDF and DOCX so the parsers can be measured."""
+    from fpdf import FPDF
+    from docx import Document
+
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=11)
+    pdf.multi_cell(0, 5, text)
+    pdf_path = os.path.join(folder, f"{name}.pdf")
+    pdf.output(pdf_path)
+
+    doc = Document()
+    for line in text.splitlines():
+        doc.add_paragraph(line)
+    docx_path = os.path.join(folder, f"{name}.docx")
+    doc.save(docx_path)
+    return pdf_path, docx_path
+
+
+def bench_pipeline(args):
+    """The full regression suite. Each operation is reported separately; failures don't stop the run."""
+    workdir = tempfile.mkdtemp(prefix="resume-bench-")
+    hf_server, hf_url, _ = start_scripted_stub({}, default=[
+        (200, args.llm_latency / 1000, {}, [{"generated_text": "- Add SQL\n- Quantify impact\n- Tighten headings"}]),
+    ])
+    # Everything that persists is redirected before the backend modules read config
+    os.environ.update({
+        "HF_API_BASE": hf_url,
+        "DATABASE_URI": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embeddings.db"),
+        "LLM_CACHE_PATH": os.path.join(workdir, "llm_cache.db"),
+        "TASK_QUEUE_PATH": os.path.join(workdir, "tasks.db"),
+        "RESUME_INDEX_PATH": os.path.join(workdir, "resume_index.npz"),
+        "EXPORT_CACHE_DIR": os.path.join(workdir, "exports"),
+    })
+
+    import api
+    import ai_suggester
+    import model_registry
+    # Registered after import so the stub replaces resume_rewriter's loader
+    model_registry.register("groq_client", lambda: StubGroq(args.llm_latency / 1000))
+    ai_suggester.HF_TOKEN = ai_suggester.HF_TOKEN or "benchmark"
+    from models import db, Resume, Job, init_db
+    from jd_matcher import match_resume_to_jd
+    from keyword_analyzer import missing_keywords
+    import resume_parser
+    from prompt_compactor import compact_pair, budget_for
+    from ai_suggester import MODEL_CANDIDATES
+
+    sizes = {"short": 150, "medium": 600, "long": 1500}
+    jd_text = synthetic_resume(150, seed=-1)
+    counter = iter(range(10 ** 9))
+
+    def fresh(size):
+        # A new text per run so caches never turn a measurement into a lookup
+        return synthetic_resume(sizes[size], seed=next(counter))
+
+    def compact_checked(resume_text):
+        # Compaction must keep every JD keyword the resume already has
+        _, _, stats = compact_pair(resume_text, jd_text, budget_for(*MODEL_CANDIDATES))
+        if stats["keywordsDropped"]:
+            raise RuntimeError(f"compaction dropped JD keywords: {stats['keywordsDropped']}")
+
+    operations = {}
+    for size in sizes:
+        operations[f"match_resume_to_jd/{size}"] = lambda size=size: match_resume_to_jd(fresh(size), jd_text)
+        operations[f"missing_keywords/{size}"] = lambda size=size: missing_keywords(fresh(size), jd_text)
+        operations[f"compact_pair/{size}"] = lambda size=size: compact_checked(fresh(size))
+
+    def parse_uncached(path):
+        # The parse cache would turn every run after the first into a hash lookup
+        with resume_parser._parse_cache_lock:
+            resume_parser._parse_cache.clear()
+        return resume_parser.extract_resume_text(path)
+
+    for size, n_words in sizes.items():
+        pdf_path, docx_path = _write_resume_files(workdir, synthetic_resume(n_words, seed=n_words), size)
+        operations[f"extract_resume_text/pdf/{size}"] = lambda p=pdf_path: parse_uncached(p)
+        operations[f"extract_resume_text/docx/{size}"] = lambda p=docx_path: parse_uncached(p)
+
+    client = api.app.test_client()
+    for fmt in ("txt", "pdf", "docx"):
+        operations[f"download/{fmt}"] = lambda fmt=fmt: client.post(
+            f"/download/{fmt}", json={"text": fresh("medium")}, follow_redirects=True,
+        )
+
+    with api.app.app_context():
+        init_db()
+        job = Job(title="Benchmark", description=jd_text)
+        stored_resume = Resume(full_text=synthetic_resume(sizes["medium"], seed=-2))
+        db.session.add_all([job, stored_resume])
+        db.session.commit()
+        job_id, stored_resume_id = job.id, stored_resume.id
+
+    def analyze():
+        with api.app.app_context():
+            resume = Resume(full_text=fresh("medium"))
+            db.session.add(resume)
+            db.session.commit()
+            resume_id = resume.id
+        response = client.post("/analyze", json={"resume_id": resume_id, "job_id": job_id})
+        if response.status_code != 200:
+            raise RuntimeError(f"/analyze returned {response.status_code}")
+    operations["analyze/end_to_end"] = analyze
+
+    def analyze_stored():
+        # The same pair every time: after the warm-up call the persisted result is returned
+        response = client.post("/analyze", json={"resume_id": stored_resume_id, "job_id": job_id})
+        if response.status_code != 200:
+            raise RuntimeError(f"/analyze returned {response.status_code}")
+    operations["analyze/stored"] = analyze_stored
+
+    results = {}
+    for name, fn in operations.items():
+        if args.only and args.only not in name:
+            continue
+        try:
+            fn()  # warm-up: model loading and first-call costs are not part of steady state
+            results[name] = summarize(_timed(fn, args.repeat))
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+
+    hf_server.shutdown()
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "gitCommit": _git_commit(),
+            "repeat": args.repeat,
+            "stubLlmLatencyMs": args.llm_latency,
+        },
+        "results": results,
+    }
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def bench_linkedin(args):
+    """
+    Profile fetching against a local fixture server: cold (rate-limited, concurrent)
+    vs. cached, checking the parsed sections, request spacing, cache hits, TTL
+    expiry, a 429 retry and how a failing URL is reported.
+    """
+    workdir = tempfile.mkdtemp(prefix="resume-bench-")
+    os.environ["LINKEDIN_CACHE_PATH"] = os.path.join(workdir, "linkedin_cache.db")
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    import linkedin_scraper
+
+    latency, words = args.llm_latency / 1000, " ".join(WORDS[:5])
+    scripts = {
+        f"/in/{i}": [(200, latency, HTML, PROFILE_FIXTURE.format(n=i, words=words))]
+        for i in range(args.profiles)
+    }
+    scripts["/in/rate-limited"] = [
+        (429, 0, {"Retry-After": "0"}, ""),
+        (200, latency, HTML, PROFILE_FIXTURE.format(n="rate-limited", words=words)),
+    ]
+    server, base_url, calls = start_scripted_stub(scripts)  # /in/missing is not scripted: 404
+    urls = [f"{base_url}/in/{i}" for i in range(args.profiles)] + [f"{base_url}/in/rate-limited"]
+    missing = f"{base_url}/in/missing"
+    expected = {
+        "experience": [f"Data Analyst Built {words} dashboards", f"Junior Analyst Automated {words} reporting"],
+        "skills": ["Python", "SQL", "Tableau"],
+    }
+    results = {"rateLimit": linkedin_scraper.RATE_LIMIT, "workers": linkedin_scraper.WORKERS}
+    failures = []
+
+    def check(name, condition, message):
+        if not condition:
+            failures.append(f"{name}: {message}")
+
+    fetched = {}
+    for name in ("cold", "cached"):
+        first_call = len(calls)
+        start = time.perf_counter()
+        profiles = linkedin_scraper.fetch_profiles(urls + [missing])
+        elapsed = time.perf_counter() - start
+        requested = [path for path, _ in calls[first_call:]]
+        errors = {url: p["error"] for url, p in profiles.items() if "error" in p}
+        results[name] = {
+            "seconds": round(elapsed, 3),
+            "profilesPerSecond": round(len(urls) / elapsed, 2) if elapsed else None,
+            "requests": len(requested),
+            "errors": list(errors.values())[:3],
+        }
+        check(name, list(errors) == [missing] and "404" in errors[missing], f"errors {errors}")
+        if name == "cold":
+            fetched = profiles
+            for url in urls:
+                got = {section: profiles[url].get(section) for section in expected}
+                check(name, got == expected, f"{url} parsed as {got}")
+            check(name, requested.count("/in/rate-limited") == 2, "429 was not retried exactly once")
+            if linkedin_scraper.RATE_LIMIT > 0:
+                times = sorted(t for _, t in calls[first_call:])
+                gap = min((b - a for a, b in zip(times, times[1:])), default=None)
+                results[name]["minGapS"] = round(gap, 3) if gap is not None else None
+                check(name, gap is None or gap >= 0.9 / linkedin_scraper.RATE_LIMIT,
+                      f"requests {gap:.3f}s apart with a rate limit of {linkedin_scraper.RATE_LIMIT}/s")
+        else:
+            # Only the failing URL, which is never cached, goes back to the server
+            check(name, requested == ["/in/missing"], f"requested {requested}")
+            check(name, all(profiles[url] == fetched[url] for url in urls), "cached profiles differ")
+
+    cache = linkedin_scraper._get_cache()
+    ttl, cache.ttl = cache.ttl, 0
+    first_call = len(calls)
+    linkedin_scraper.fetch_profile(urls[0])
+    cache.ttl = ttl
+    check("ttl", len(calls) - first_call == 1, "an expired cache entry was served without a request")
+
+    sample = fetched[urls[0]]
+    results["sample"] = {"experience": sample.get("experience"), "skills": sample.get("skills")}
+    results["failures"] = failures
+    server.shutdown()
+    return results
+
+
+BENCHMARKS = {
+    "chunking": bench_chunking,
+    "startup": bench_startup,
+    "keywords": bench_keywords,
+    "pipeline": bench_pipeline,
+    "backends": bench_backends,
+    "index": bench_index,
+    "hf": bench_hf,
+    "linkedin": bench_linkedin,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--resumes", type=int, default=10000, help="pool size for the keywords benchmark")
+    parser.add_argument("--llm-latency", type=float, default=200, help="simulated Groq/HF/page latency in ms (pipeline, linkedin)")
+    parser.add_argument("--profiles", type=int, default=20, help="profile URLs fetched by the linkedin benchmark")
+    parser.add_argument("--vectors", type=int, default=20000, help="index size for the index benchmark")
+    parser.add_argument("--min-recall", type=float, default=0.9, help="recall@10 required at RESUME_INDEX_NPROBE")
+    parser.add_argument("--only", default=None, help="run only pipeline operations whose name contains this")
+    parser.add_argument("--output", default=None, help="also write the JSON results to this file")
+    args = parser.parse_args()
+    # Backend modules log with print(); keep stdout for the JSON alone
+    with contextlib.redirect_stdout(sys.stderr):
+        results = BENCHMARKS[args.benchmark](args)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if results.get("failures"):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# backend/config.py
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Flask-SQLAlchemy keeps resumes.db in the app's instance folder; our own stores live next to it.
+INSTANCE_DIR = os.path.join(BASE_DIR, 'instance')
+
+# --- Database ---
+DATABASE_URI = os.getenv("DATABASE_URI", 'sqlite:///resumes.db')
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds
+SQLITE_WAL = os.getenv("SQLITE_WAL", "1") == "1"  # WAL lets readers proceed while a writer commits
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# --- Startup ---
+# Comma-separated model_registry names to load before the API server starts ("all", or empty for none).
+WARM_UP_MODELS = os.getenv("WARM_UP_MODELS", "all")
+
+# --- Embeddings ---
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(INSTANCE_DIR, 'embeddings.db'))
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))  # in-memory LRU entries
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+# "sentence-transformers" (PyTorch) or "onnx" (int8-quantized ONNX Runtime, needs onnxruntime).
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
+EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", os.path.join(INSTANCE_DIR, 'onnx'))
+EMBEDDING_MAX_TOKENS = int(os.getenv("EMBEDDING_MAX_TOKENS", "256"))  # the model's word-piece limit
+# Long texts are truncated by the model at 256 word pieces; chunking embeds them window by window.
+# Modes: "off" (whole text, truncated), "max", "mean" or "section".
+EMBEDDING_CHUNK_MODE = os.getenv("EMBEDDING_CHUNK_MODE", "off")
+EMBEDDING_CHUNK_WORDS = int(os.getenv("EMBEDDING_CHUNK_WORDS", "160"))  # ~256 word pieces
+
+# --- Ranking ---
+RANK_DEFAULT_TOP_K = int(os.getenv("RANK_DEFAULT_TOP_K", "10"))
+# Points subtracted when every JD keyword is missing; each missing keyword costs its IDF share of this.
+IDF_PENALTY_POINTS = float(os.getenv("IDF_PENALTY_POINTS", "30"))
+
+# --- Hugging Face inference client ---
+HF_API_BASE = os.getenv("HF_API_BASE", "https://api-inference.huggingface.co")  # point at a stub server for local runs
+HF_TIMEOUT = float(os.getenv("HF_TIMEOUT", "60"))
+HF_RETRIES = int(os.getenv("HF_RETRIES", "3"))  # attempts per model on 429/503
+HF_BACKOFF = float(os.getenv("HF_BACKOFF", "2.0"))  # seconds, multiplied by the attempt number
+HF_POOL_SIZE = int(os.getenv("HF_POOL_SIZE", "10"))
+HF_HEDGE_AFTER = float(os.getenv("HF_HEDGE_AFTER", "0"))  # seconds before racing the next model; 0 disables
+HF_BREAKER_THRESHOLD = int(os.getenv("HF_BREAKER_THRESHOLD", "3"))  # consecutive failures that open the breaker
+HF_BREAKER_COOLDOWN = float(os.getenv("HF_BREAKER_COOLDOWN", "300"))  # seconds a model is skipped once open
+
+# --- LLM response cache ---
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(INSTANCE_DIR, 'llm_cache.db'))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+# --- LLM prompt compaction ---
+# Tokens of resume + JD text each model's prompt may carry; longer inputs keep only their most relevant chunks.
+PROMPT_TOKEN_BUDGETS = {
+    "google/flan-t5-base": int(os.getenv("PROMPT_BUDGET_FLAN_T5", "420")),  # 512-token encoder minus instructions
+    "google/flan-t5-small": int(os.getenv("PROMPT_BUDGET_FLAN_T5", "420")),
+    "llama-3.1-8b-instant": int(os.getenv("PROMPT_BUDGET_GROQ", "6000")),
+}
+PROMPT_DEFAULT_BUDGET = int(os.getenv("PROMPT_DEFAULT_BUDGET", "2000"))
+PROMPT_JD_SHARE = float(os.getenv("PROMPT_JD_SHARE", "0.35"))  # budget share reserved for the JD
+PROMPT_CHUNK_WORDS = int(os.getenv("PROMPT_CHUNK_WORDS", "40"))  # granularity of what can be dropped
+PROMPT_EMBEDDING_WEIGHT = float(os.getenv("PROMPT_EMBEDDING_WEIGHT", "0.6"))  # vs. keyword overlap
+PROMPT_CHARS_PER_TOKEN = float(os.getenv("PROMPT_CHARS_PER_TOKEN", "4.0"))  # estimate for English text
+
+# --- Resume vector index ---
+RESUME_INDEX_PATH = os.getenv("RESUME_INDEX_PATH", os.path.join(INSTANCE_DIR, 'resume_index.npz'))
+RESUME_INDEX_MIN_TRAIN = int(os.getenv("RESUME_INDEX_MIN_TRAIN", "1000"))  # below this we search exactly
+RESUME_INDEX_NPROBE = int(os.getenv("RESUME_INDEX_NPROBE", "8"))  # IVF lists scanned per query
+RESUME_INDEX_USE_FAISS = os.getenv("RESUME_INDEX_USE_FAISS", "1") == "1"
+RESUME_INDEX_EF_SEARCH = int(os.getenv("RESUME_INDEX_EF_SEARCH", "64"))  # HNSW candidates per query (FAISS only)
+
+# --- Resume parsing ---
+PARSE_MAX_BYTES = int(os.getenv("PARSE_MAX_BYTES", str(10 * 1024 * 1024)))  # uploads above this are rejected
+PARSE_MAX_PAGES = int(os.getenv("PARSE_MAX_PAGES", "10"))  # PDF pages read; the rest is ignored
+PARSE_MAX_CHARS = int(os.getenv("PARSE_MAX_CHARS", "50000"))  # parsing stops once this much text is extracted
+PARSE_CACHE_SIZE = int(os.getenv("PARSE_CACHE_SIZE", "256"))  # parsed files kept in memory, keyed by file hash
+
+# --- Resume exports ---
+EXPORT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR", os.path.join(INSTANCE_DIR, 'exports'))
+EXPORT_CACHE_MAX_FILES = int(os.getenv("EXPORT_CACHE_MAX_FILES", "3000"))
+EXPORT_MAX_AGE = int(os.getenv("EXPORT_MAX_AGE", "3600"))  # Cache-Control max-age for served exports, seconds
+EXPORT_WAIT_TIMEOUT = float(os.getenv("EXPORT_WAIT_TIMEOUT", "10"))  # how long GET /exports waits on a background render, seconds
+
+# --- Bulk ingestion ---
+INGEST_STATE_PATH = os.getenv("INGEST_STATE_PATH", os.path.join(INSTANCE_DIR, 'ingest_state.json'))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "50"))
+
+# --- Analysis pipeline ---
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "8"))
+# How long a stage may wait for a free pipeline worker before it is reported as failed, seconds
+STAGE_QUEUE_TIMEOUT = float(os.getenv("STAGE_QUEUE_TIMEOUT", "60"))
+# Per-stage timeouts in seconds, measured from when the stage starts running.
+STAGE_TIMEOUTS = {
+    "similarity": float(os.getenv("STAGE_TIMEOUT_SIMILARITY", "30")),
+    "keywords": float(os.getenv("STAGE_TIMEOUT_KEYWORDS", "10")),
+    "suggestions": float(os.getenv("STAGE_TIMEOUT_SUGGESTIONS", "60")),
+    "rewrite": float(os.getenv("STAGE_TIMEOUT_REWRITE", "90")),
+}
+
+# --- Background analysis queue ---
+TASK_QUEUE_PATH = os.getenv("TASK_QUEUE_PATH", os.path.join(INSTANCE_DIR, 'tasks.db'))
+TASK_WORKERS = int(os.getenv("TASK_WORKERS", "2"))
+# A running task whose worker process stops renewing its lease for this long is run again, seconds
+TASK_LEASE_SECONDS = float(os.getenv("TASK_LEASE_SECONDS", "60"))
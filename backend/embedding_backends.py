@@ -0,0 +1,127 @@
+# backend/embedding_backends.py
+"""
+Pluggable embedding backends for jd_matcher.
+
+Every backend exposes `encode(texts, batch_size) -> np.ndarray` and a
+`cache_id` used to namespace the embedding cache, so vectors from different
+backends are never mixed.
+"""
+import importlib.util
+import os
+
+import numpy as np
+
+from config import EMBEDDING_BACKEND, EMBEDDING_ONNX_DIR, EMBEDDING_MAX_TOKENS
+
+BACKENDS = ("sentence-transformers", "onnx")
+
+
+def _hub_id(model_name):
+    # sentence-transformers resolves short names like "all-MiniLM-L6-v2" under this org
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+
+class SentenceTransformerBackend:
+    """The original full-precision PyTorch model."""
+
+    name = "sentence-transformers"
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+        # Kept equal to the model name so caches written before backends existed stay valid
+        self.cache_id = model_name
+
+    def encode(self, texts, batch_size=32):
+        return self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+
+class OnnxBackend:
+    """
+    The same model exported to ONNX and dynamically quantized to int8, run with
+    ONNX Runtime on CPU. Mean pooling + L2 normalization reproduce the
+    sentence-transformers pipeline for MiniLM. The export happens once (needs
+    torch) and is reused from EMBEDDING_ONNX_DIR afterwards.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_name, model_dir=EMBEDDING_ONNX_DIR, max_tokens=EMBEDDING_MAX_TOKENS):
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        hub_id = _hub_id(model_name)
+        self.max_tokens = max_tokens
+        self.cache_id = f"{model_name}:onnx-int8"
+        folder = os.path.join(model_dir, hub_id.replace("/", "__"))
+        quantized_path = os.path.join(folder, "model_int8.onnx")
+        if not os.path.exists(quantized_path):
+            self._export(hub_id, folder, quantized_path)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(folder)
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(quantized_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    @staticmethod
+    def _export(hub_id, folder, quantized_path):
+        import torch
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        from transformers import AutoModel, AutoTokenizer
+
+        print(f"Exporting {hub_id} to ONNX (one-time)...")
+        os.makedirs(folder, exist_ok=True)
+        tokenizer = AutoTokenizer.from_pretrained(hub_id)
+        model = AutoModel.from_pretrained(hub_id).eval()
+        tokenizer.save_pretrained(folder)
+
+        sample = tokenizer(["export sample"], return_tensors="pt")
+        float_path = os.path.join(folder, "model.onnx")
+        dynamic = {0: "batch", 1: "tokens"}
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+                float_path,
+                input_names=["input_ids", "attention_mask", "token_type_ids"],
+                output_names=["last_hidden_state"],
+                dynamic_axes={"input_ids": dynamic, "attention_mask": dynamic,
+                              "token_type_ids": dynamic, "last_hidden_state": dynamic},
+                opset_version=14,
+            )
+        quantize_dynamic(float_path, quantized_path, weight_type=QuantType.QInt8)
+        os.remove(float_path)
+
+    def encode(self, texts, batch_size=32):
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            batch = self.tokenizer(
+                list(texts[start:start + batch_size]), padding=True, truncation=True,
+                max_length=self.max_tokens, return_tensors="np",
+            )
+            feeds = {k: v.astype(np.int64) for k, v in batch.items() if k in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+            mask = batch["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            outputs.append(pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None))
+        return np.vstack(outputs) if outputs else np.empty((0, 0), dtype=np.float32)
+
+
+def cache_id_for(model_name, backend=EMBEDDING_BACKEND):
+    """Cache namespace for a backend, known without loading it (ONNX counts only if onnxruntime is installed)."""
+    if backend == "onnx" and importlib.util.find_spec("onnxruntime") is not None:
+        return f"{model_name}:onnx-int8"
+    return model_name
+
+
+def load_backend(model_name, backend=EMBEDDING_BACKEND):
+    """Builds the configured backend; ONNX falls back to sentence-transformers if it can't load."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {BACKENDS}")
+    if backend == "onnx":
+        try:
+            return OnnxBackend(model_name)
+        except Exception as e:
+            print(f"ONNX embedding backend unavailable ({e}); falling back to sentence-transformers.")
+    return SentenceTransformerBackend(model_name)
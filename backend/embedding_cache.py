@@ -0,0 +1,125 @@
+# backend/embedding_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_text(text):
+    """Collapses whitespace so trivially different copies of a text share one embedding."""
+    return " ".join((text or "").split())
+
+
+def text_key(text, model_name):
+    """Content address for an embedding: hash of the model name plus the normalized text."""
+    data = f"{model_name}\x00{normalize_text(text)}".encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding store: an in-memory LRU in front of a SQLite table,
+    so each unique (model, text) pair is encoded exactly once across restarts.
+    """
+
+    def __init__(self, path, max_items=2048):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.max_items = max_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " dim INTEGER NOT NULL,"
+            " vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return vector
+            row = self._conn.execute(
+                "SELECT dim, vector FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            vector = np.frombuffer(row[1], dtype=np.float32).reshape(row[0])
+            self._remember(key, vector)
+            self.disk_hits += 1
+            return vector
+
+    def put_many(self, items, model_name):
+        """Stores (key, vector) pairs in one transaction."""
+        rows = []
+        with self._lock:
+            for key, vector in items:
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                rows.append((key, model_name, vector.shape[0], vector.tobytes()))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, dim, vector) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def get_or_encode(self, texts, model_name, encode_fn, resolve_model_name=None):
+        """
+        Returns a (len(texts), dim) float32 matrix. Texts that are not cached yet are
+        de-duplicated and passed to `encode_fn` in a single batch.
+        `model_name` may be a prediction made before the model is loaded; when there
+        are misses, `resolve_model_name()` gives the actual one, and a mismatch
+        repeats the lookup under it, so vectors are never stored under the wrong name.
+        """
+        keys = [text_key(t, model_name) for t in texts]
+        found = {}
+        pending = OrderedDict()
+        for key, text in zip(keys, texts):
+            if key in found or key in pending:
+                continue
+            vector = self.get(key)
+            if vector is None:
+                pending[key] = normalize_text(text)
+            else:
+                found[key] = vector
+
+        if pending:
+            actual = resolve_model_name() if resolve_model_name is not None else model_name
+            if actual != model_name:
+                return self.get_or_encode(texts, actual, encode_fn)
+            encoded = np.asarray(encode_fn(list(pending.values())), dtype=np.float32)
+            new_items = list(zip(pending.keys(), encoded))
+            self.put_many(new_items, model_name)
+            found.update(new_items)
+
+        return np.stack([found[key] for key in keys])
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "memoryHits": self.memory_hits,
+                "diskHits": self.disk_hits,
+                "misses": self.misses,
+                "hitRate": round(hits / lookups, 4) if lookups else 0.0,
+                "memoryEntries": len(self._memory),
+            }
@@ -0,0 +1,149 @@
+# backend/export_cache.py
+"""
+Rendered resume exports (TXT/PDF/DOCX), cached on disk by content hash and format.
+
+The same optimized resume is usually downloaded several times and in several
+formats, so each (text, format) pair is rendered once, ideally in the
+background as soon as a rewrite completes, and then served from disk.
+"""
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from config import EXPORT_CACHE_DIR, EXPORT_CACHE_MAX_FILES
+from metrics import timed
+
+MIMETYPES = {
+    "txt": "text/plain",
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+FORMATS = tuple(MIMETYPES)
+
+_render_locks = {}
+_locks_guard = threading.Lock()
+_background = ThreadPoolExecutor(max_workers=2, thread_name_prefix="export-render")
+_pending = {}  # export path -> Future of its background render
+
+
+def export_id(text):
+    """Content hash identifying a resume text; also used as the ETag."""
+    return hashlib.sha256((text or "").encode('utf-8')).hexdigest()
+
+
+def export_path(content_id, fmt):
+    return os.path.join(EXPORT_CACHE_DIR, f"{content_id}.{fmt}")
+
+
+def _render_txt(text):
+    return text.encode('utf-8')
+
+
+def _render_pdf(text):
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=11)
+    pdf.multi_cell(0, 5, text.encode('latin-1', 'replace').decode('latin-1'))
+    # fpdf2 returns a bytearray; the original PyFPDF returned a latin-1 str
+    output = pdf.output(dest='S')
+    return output.encode('latin-1') if isinstance(output, str) else bytes(output)
+
+
+def _render_docx(text):
+    from docx import Document
+    doc = Document()
+    doc.add_paragraph(text)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+RENDERERS = {"txt": _render_txt, "pdf": _render_pdf, "docx": _render_docx}
+
+
+def _lock_for(path):
+    with _locks_guard:
+        return _render_locks.setdefault(path, threading.Lock())
+
+
+def _prune():
+    """Drops the least recently written exports beyond EXPORT_CACHE_MAX_FILES."""
+    entries = [e for e in os.scandir(EXPORT_CACHE_DIR) if e.is_file() and not e.name.endswith(".tmp")]
+    overflow = len(entries) - EXPORT_CACHE_MAX_FILES
+    if overflow > 0:
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime)[:overflow]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+def render_export(text, fmt):
+    """Returns (path, content id) of the rendered file, rendering it only if it isn't cached yet."""
+    if fmt not in RENDERERS:
+        raise ValueError(f"Unsupported export format {fmt!r}; expected one of {FORMATS}")
+    content_id = export_id(text)
+    path = export_path(content_id, fmt)
+    if os.path.exists(path):
+        return path, content_id
+
+    with _lock_for(path):
+        # Another request may have rendered it while we waited for the lock
+        if not os.path.exists(path):
+            os.makedirs(EXPORT_CACHE_DIR, exist_ok=True)
+            with timed(f"render_{fmt}"):
+                data = RENDERERS[fmt](text or "")
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            _prune()
+    with _locks_guard:
+        _render_locks.pop(path, None)
+    return path, content_id
+
+
+def _render_done(path, future):
+    with _locks_guard:
+        _pending.pop(path, None)
+    if future.exception() is not None:
+        print(f"Backend: Background export render failed for {os.path.basename(path)}: {future.exception()}")
+
+
+def prerender_exports(text, formats=FORMATS):
+    """Renders every format in the background; returns the content id for building download URLs."""
+    content_id = export_id(text)
+    for fmt in formats:
+        path = export_path(content_id, fmt)
+        if os.path.exists(path):
+            continue
+        with _locks_guard:
+            if path in _pending:
+                continue
+            future = _pending[path] = _background.submit(render_export, text, fmt)
+        future.add_done_callback(lambda f, path=path: _render_done(path, f))
+    return content_id
+
+
+def export_pending(content_id, fmt):
+    """True while a background render of this export is queued or running."""
+    with _locks_guard:
+        return export_path(content_id, fmt) in _pending
+
+
+def wait_for_export(content_id, fmt, timeout):
+    """Path of a rendered export, waiting up to `timeout` seconds for its background render; None if not ready."""
+    path = export_path(content_id, fmt)
+    with _locks_guard:
+        future = _pending.get(path)
+    if future is not None:
+        try:
+            future.result(timeout=timeout)
+        except FutureTimeout:
+            return None
+        except Exception:
+            pass  # logged by _render_done; the file check below reports it missing
+    return path if os.path.exists(path) else None
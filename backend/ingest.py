@@ -0,0 +1,158 @@
+# backend/ingest.py
+"""
+Bulk resume ingestion.
+
+Walks a folder of PDF/DOCX resumes, parses them in a process pool, skips
+duplicates by content hash, inserts Candidate/Resume rows in batched
+transactions and precomputes their embeddings and keyword sets.
+Interrupted runs pick up where they stopped: files already recorded in the
+state file (same size and mtime) are skipped.
+
+Usage (from the backend folder):
+    python ingest.py ../resumes --workers 4
+"""
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from api import app, db
+from models import Candidate, Resume, content_hash, init_db
+from resume_parser import extract_resume_text
+from resume_index import index_resumes
+from keyword_index import index_resume_keywords
+from config import INGEST_STATE_PATH, INGEST_BATCH_SIZE
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx")
+EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+
+
+def find_resume_files(folder):
+    paths = []
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return [stat.st_size, int(stat.st_mtime)]
+
+
+def _parse_file(path):
+    """Runs in a worker process. Returns (path, text, content hash) or (path, None, error)."""
+    try:
+        text = extract_resume_text(path)
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+    if not text:
+        return path, None, "no text extracted"
+    return path, text, content_hash(text)
+
+
+def _load_state(path):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {"files": {}}
+
+
+def _save_state(state, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def _candidate_for(text, path):
+    """Reuses the candidate with the same email, or creates one named after the resume's first line."""
+    match = EMAIL_RE.search(text)
+    email = match.group(0).lower() if match else None
+    if email:
+        existing = Candidate.query.filter_by(email=email).first()
+        if existing:
+            return existing
+    first_line = next((line.strip() for line in text.splitlines() if line.strip()), "")
+    name = first_line if 0 < len(first_line) <= 120 else os.path.splitext(os.path.basename(path))[0]
+    candidate = Candidate(name=name[:120], email=email)
+    db.session.add(candidate)
+    return candidate
+
+
+def _existing_hashes():
+    # The indexed hash column only; no resume text is loaded
+    return {h for (h,) in db.session.query(Resume.content_hash) if h}
+
+
+def ingest_folder(folder, workers=None, batch_size=INGEST_BATCH_SIZE, state_path=INGEST_STATE_PATH):
+    state = _load_state(state_path)
+    all_files = find_resume_files(folder)
+    todo = [p for p in all_files if state["files"].get(os.path.abspath(p)) != _file_signature(p)]
+    print(f"Ingest: {len(all_files)} files found, {len(all_files) - len(todo)} already done, {len(todo)} to process.")
+
+    seen = _existing_hashes()
+    stats = {"inserted": 0, "duplicates": 0, "failed": 0}
+    start = time.perf_counter()
+    batch = []
+
+    def flush():
+        if batch:
+            db.session.flush()  # assigns ids for the index
+            index_resumes(batch)
+            index_resume_keywords(batch)
+        db.session.commit()
+        _save_state(state, state_path)
+        batch.clear()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for i, (path, text, result) in enumerate(pool.map(_parse_file, todo, chunksize=4), start=1):
+            if text is None:
+                stats["failed"] += 1
+                print(f"Ingest: skipped {path} ({result})")
+            elif result in seen:
+                stats["duplicates"] += 1
+            else:
+                seen.add(result)
+                candidate = _candidate_for(text, path)
+                resume = Resume(candidate=candidate, full_text=text)
+                db.session.add(resume)
+                batch.append(resume)
+                stats["inserted"] += 1
+            # Failed files are not recorded, so they are retried on the next run
+            if text is not None:
+                state["files"][os.path.abspath(path)] = _file_signature(path)
+            if i % batch_size == 0:
+                flush()
+        flush()
+
+    elapsed = time.perf_counter() - start
+    stats["files"] = len(todo)
+    stats["seconds"] = round(elapsed, 2)
+    stats["filesPerSecond"] = round(len(todo) / elapsed, 2) if elapsed else 0.0
+    print(f"Ingest: {stats}")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", help="folder containing PDF/DOCX resumes")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--state", default=INGEST_STATE_PATH, help="progress file used to resume interrupted runs")
+    parser.add_argument("--restart", action="store_true", help="ignore the progress file and reprocess every file")
+    args = parser.parse_args()
+
+    if args.restart and os.path.exists(args.state):
+        os.remove(args.state)
+    with app.app_context():
+        init_db()
+        ingest_folder(args.folder, args.workers, args.batch_size, args.state)
+
+
+if __name__ == '__main__':
+    main()
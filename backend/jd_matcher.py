@@ -1,19 +1,229 @@
-from sentence_transformers import SentenceTransformer, util
+import re
 
-# Load a pre-trained model for semantic search.
-model = SentenceTransformer('all-MiniLM-L6-v2')
+import numpy as np
 
-def match_resume_to_jd(resume_text, jd_text):
+import model_registry
+from metrics import timed
+from config import (
+    EMBEDDING_MODEL_NAME, EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_SIZE, EMBEDDING_BATCH_SIZE,
+    EMBEDDING_CHUNK_MODE, EMBEDDING_CHUNK_WORDS, EMBEDDING_BACKEND,
+)
+from embedding_cache import EmbeddingCache
+from embedding_backends import load_backend, cache_id_for
+
+# The pre-trained model for semantic search (PyTorch or ONNX, see EMBEDDING_BACKEND) is loaded on first use.
+model_registry.register("embedding_model", lambda: load_backend(EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND))
+
+def get_model():
+    return model_registry.get("embedding_model")
+
+def __getattr__(name):
+    # Keeps `jd_matcher.model` working without loading the model at import time
+    if name == "model":
+        return get_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Every unique text is encoded once; repeated resumes/JDs are served from the cache.
+embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_SIZE)
+
+CHUNK_MODES = ("off", "max", "mean", "section")
+
+# Relative weight of each resume section in "section" chunk mode.
+SECTION_WEIGHTS = {
+    "experience": 1.0,
+    "work experience": 1.0,
+    "professional experience": 1.0,
+    "projects": 1.0,
+    "skills": 1.0,
+    "technical skills": 1.0,
+    "summary": 0.8,
+    "certifications": 0.6,
+    "education": 0.5,
+}
+DEFAULT_SECTION_WEIGHT = 0.7
+
+# Other headers recognized in resumes and job descriptions (they get DEFAULT_SECTION_WEIGHT).
+SECTION_HEADERS = frozenset(SECTION_WEIGHTS) | {
+    "profile", "objective", "professional summary", "employment history", "work history",
+    "key skills", "core competencies", "certificates", "courses", "achievements", "awards",
+    "publications", "languages", "interests", "volunteer experience", "additional information",
+    "references", "contact", "responsibilities", "requirements", "qualifications",
+    "preferred qualifications", "nice to have", "benefits", "about us", "about the role",
+}
+
+_HEADER_RE = re.compile(r'^\s*([A-Za-z][A-Za-z &/]{1,40}?)\s*(:?)\s*$')
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+|\n+')
+
+def _encode_batch(batch):
+    with timed("encode"):
+        return get_model().encode(batch, batch_size=EMBEDDING_BATCH_SIZE)
+
+def embedding_cache_id(resolve=False):
+    """
+    Identifies the embedding model and backend. Until the model is loaded this is
+    a prediction, which `resolve` replaces by loading it (an ONNX backend may have
+    fallen back to PyTorch).
+    """
+    if resolve or model_registry.is_loaded("embedding_model"):
+        return get_model().cache_id
+    return cache_id_for(EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND)
+
+def encode_texts(texts):
+    """
+    Returns a (len(texts), dim) matrix of embeddings, encoding only the texts
+    that are not in the embedding cache yet.
+    """
+    # Misses load the model, and a backend that fell back is only known after that
+    return embedding_cache.get_or_encode(
+        texts, embedding_cache_id(), _encode_batch, resolve_model_name=lambda: embedding_cache_id(resolve=True),
+    )
+
+def embedding_cache_stats():
+    return embedding_cache.stats()
+
+def split_into_chunks(text, max_words=EMBEDDING_CHUNK_WORDS):
+    """
+    Splits text into section-aligned windows of at most `max_words` words.
+    A standalone line starts a new section when it is a known section name
+    (SECTION_HEADERS, any case) or a short phrase ending in ":"; other short
+    lines such as a name or one skill per line stay content. Within a section,
+    whole sentences/lines are packed into windows.
+    Returns a list of (section_name, chunk_text) pairs.
+    """
+    sections = []
+    current_name, current_lines = "", []
+    for line in (text or "").splitlines():
+        header = _HEADER_RE.match(line)
+        if header and (header.group(1).strip().lower() in SECTION_HEADERS
+                       or (header.group(2) and len(header.group(1).split()) <= 4)):
+            if current_lines:
+                sections.append((current_name, current_lines))
+            current_name, current_lines = header.group(1).strip().lower(), []
+        elif line.strip():
+            current_lines.append(line.strip())
+    if current_lines:
+        sections.append((current_name, current_lines))
+
+    chunks = []
+    for name, lines in sections:
+        window, window_words = [], 0
+        for sentence in _SENTENCE_RE.split("\n".join(lines)):
+            words = sentence.split()
+            # Sentences longer than a window are split on word boundaries
+            while len(words) > max_words:
+                if window:
+                    chunks.append((name, " ".join(window)))
+                    window, window_words = [], 0
+                chunks.append((name, " ".join(words[:max_words])))
+                words = words[max_words:]
+            if window_words + len(words) > max_words and window:
+                chunks.append((name, " ".join(window)))
+                window, window_words = [], 0
+            if words:
+                window.append(" ".join(words))
+                window_words += len(words)
+        if window:
+            chunks.append((name, " ".join(window)))
+
+    return chunks or [("", text or "")]
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def _section_weights(sections):
+    return np.array([SECTION_WEIGHTS.get(s, DEFAULT_SECTION_WEIGHT) for s in sections], dtype=np.float32)
+
+def _chunked_similarities(resume_texts, jd_text, mode):
+    """Chunk every document, encode all chunks in one batched call, then aggregate per resume."""
+    jd_chunks = split_into_chunks(jd_text)
+    resume_chunks = [split_into_chunks(t) for t in resume_texts]
+
+    all_texts = [c for _, c in jd_chunks] + [c for chunks in resume_chunks for _, c in chunks]
+    embeddings = _normalize_rows(encode_texts(all_texts))
+    jd_embeddings = embeddings[:len(jd_chunks)]
+
+    similarities = []
+    offset = len(jd_chunks)
+    for chunks in resume_chunks:
+        chunk_embeddings = embeddings[offset:offset + len(chunks)]
+        offset += len(chunks)
+        if mode == "max":
+            # How well each JD chunk is covered by its best-matching resume chunk
+            score = (chunk_embeddings @ jd_embeddings.T).max(axis=0).mean()
+        else:
+            weights = _section_weights([s for s, _ in chunks]) if mode == "section" else None
+            resume_vec = _normalize_rows(np.average(chunk_embeddings, axis=0, weights=weights))
+            jd_vec = _normalize_rows(jd_embeddings.mean(axis=0))
+            score = resume_vec @ jd_vec
+        similarities.append(float(score))
+    return similarities
+
+def _chunked_similarities_to_jds(resume_text, jd_texts, mode):
+    """One resume against many JDs: every chunk is encoded in one batched call, then one matrix product."""
+    resume_chunks = split_into_chunks(resume_text)
+    jd_chunks = [split_into_chunks(t) for t in jd_texts]
+
+    all_texts = [c for _, c in resume_chunks] + [c for chunks in jd_chunks for _, c in chunks]
+    embeddings = _normalize_rows(encode_texts(all_texts))
+    resume_embeddings = embeddings[:len(resume_chunks)]
+    jd_embeddings = embeddings[len(resume_chunks):]
+    counts = np.array([len(chunks) for chunks in jd_chunks])
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    if mode == "max":
+        # Per JD chunk, its best-matching resume chunk; averaged per JD
+        best = (resume_embeddings @ jd_embeddings.T).max(axis=0)
+        return np.add.reduceat(best, starts) / counts
+    weights = _section_weights([s for s, _ in resume_chunks]) if mode == "section" else None
+    resume_vec = _normalize_rows(np.average(resume_embeddings, axis=0, weights=weights))
+    jd_vecs = _normalize_rows(np.add.reduceat(jd_embeddings, starts, axis=0) / counts[:, None])
+    return jd_vecs @ resume_vec
+
+def match_resumes_to_jd(resume_texts, jd_text, chunk_mode=None):
+    """
+    Scores many resumes against one job description. All texts are encoded in
+    batches and the similarities come from a single matrix-vector product.
+    Returns a list of percentages in the same order as `resume_texts`.
+    """
+    if not resume_texts:
+        return []
+    mode = chunk_mode or EMBEDDING_CHUNK_MODE
+    if mode not in CHUNK_MODES:
+        raise ValueError(f"Unknown chunk mode {mode!r}; expected one of {CHUNK_MODES}")
+
+    if mode == "off":
+        embeddings = _normalize_rows(encode_texts(list(resume_texts) + [jd_text]))
+        similarities = embeddings[:-1] @ embeddings[-1]
+    else:
+        similarities = _chunked_similarities(list(resume_texts), jd_text, mode)
+    return [round(float(s) * 100, 2) for s in similarities]
+
+def match_resume_to_jds(resume_text, jd_texts, chunk_mode=None):
+    """
+    Scores one resume against many job descriptions. The resume is encoded once,
+    job embeddings come from the cache (precomputed when jobs are stored), and
+    the similarities are a single matrix-vector product.
+    Returns a list of percentages in the same order as `jd_texts`.
+    """
+    if not jd_texts:
+        return []
+    mode = chunk_mode or EMBEDDING_CHUNK_MODE
+    if mode not in CHUNK_MODES:
+        raise ValueError(f"Unknown chunk mode {mode!r}; expected one of {CHUNK_MODES}")
+
+    if mode == "off":
+        embeddings = _normalize_rows(encode_texts([resume_text] + list(jd_texts)))
+        similarities = embeddings[1:] @ embeddings[0]
+    else:
+        similarities = _chunked_similarities_to_jds(resume_text, list(jd_texts), mode)
+    return [round(float(s) * 100, 2) for s in similarities]
+
+def match_resume_to_jd(resume_text, jd_text, chunk_mode=None):
     """
     Calculates the semantic similarity between a resume and a job description
     using a pre-trained Sentence Transformer model.
     """
-    # Create embeddings for the resume and job description
-    resume_embedding = model.encode(resume_text, convert_to_tensor=True)
-    jd_embedding = model.encode(jd_text, convert_to_tensor=True)
-    
-    # Compute cosine similarity
-    similarity_score = util.pytorch_cos_sim(resume_embedding, jd_embedding)
-    
-    # Return the similarity score as a percentage, rounded to 2 decimal places
-    return round(float(similarity_score) * 100, 2)
\ No newline at end of file
+    # Returns the similarity score as a percentage, rounded to 2 decimal places
+    return match_resumes_to_jd([resume_text], jd_text, chunk_mode)[0]
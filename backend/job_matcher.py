@@ -0,0 +1,49 @@
+# backend/job_matcher.py
+"""
+"Which of our open jobs fit this candidate": one resume against every stored job.
+
+Only the semantic similarity is computed for the whole job list; keyword gaps
+and scores are computed for the top matches only, from the stored job keywords
+with the same IDF weighting as /jobs/<id>/rank. LLM suggestions are left to the
+caller to request per job when a user opens it. Needs an app context.
+"""
+from config import RANK_DEFAULT_TOP_K
+from jd_matcher import match_resume_to_jds, encode_texts
+from keyword_index import job_terms_many, resume_terms
+from scoring_engine import score_resume_against_jobs
+
+
+def precompute_job_embeddings(jobs):
+    """Encodes job descriptions into the embedding cache so later matches only look them up."""
+    descriptions = [j.description for j in jobs if j.description]
+    if descriptions:
+        encode_texts(descriptions)
+
+
+def rank_jobs_for_resume(resume_text, jobs, top_k=RANK_DEFAULT_TOP_K):
+    """
+    `jobs` is a list of (job_id, title, description) tuples. Returns the top_k
+    matches as dicts, best first, with keyword gaps and the combined score.
+    """
+    jobs = [job for job in jobs if job[2]]
+    if not jobs or top_k <= 0:
+        return []
+    similarities = match_resume_to_jds(resume_text, [description for _, _, description in jobs])
+    best = sorted(zip(jobs, similarities), key=lambda pair: pair[1], reverse=True)[:top_k]
+
+    terms_by_job = job_terms_many([job_id for (job_id, _, _), _ in best])
+    present = resume_terms(resume_text)
+    jobs_terms = [terms_by_job[job_id] for (job_id, _, _), _ in best]
+    scores = score_resume_against_jobs(present, jobs_terms, [similarity for _, similarity in best])
+
+    matches = []
+    for ((job_id, title, _), similarity_score), terms, score in zip(best, jobs_terms, scores):
+        matches.append({
+            "jobId": job_id,
+            "title": title,
+            "matchScore": score,
+            "semanticSimilarity": similarity_score,
+            "missingKeywords": [word for term, word in terms.items() if term not in present],
+        })
+    matches.sort(key=lambda m: (m["matchScore"], m["semanticSimilarity"]), reverse=True)
+    return matches
@@ -1,5 +1,22 @@
 import re
 
+# Common English and job-posting filler words that carry no signal as keywords.
+STOPWORDS = frozenset("""
+about above after again against also among been before being below between both
+could does doing down during each either every from further have having here
+into itself just more most much must only other over same shall should some such
+than that their them then there these they this those through under until very
+were what when where which while whom will with within without would your yours
+able across along already another around based including like looking make
+ensure etc strong work working well using team role join ideal candidate
+responsible responsibilities required requirements preferred experience years
+""".split())
+
+# Suffixes stripped by stem(), longest first. Agent nouns keep their "-er"
+# ("engineer" must not merge with "engine", and matches "engineering").
+_SUFFIXES = ("ational", "ations", "ation", "ments", "ment", "ness", "ings", "ing",
+             "ity", "ed", "ly", "es", "s")
+
 def extract_keywords(text):
     return list(set(re.findall(r'\b\w{4,}\b', text.lower())))
 
@@ -7,3 +24,34 @@ def missing_keywords(resume, jd):
     resume_words = extract_keywords(resume)
     jd_words = extract_keywords(jd)
     return list(set(jd_words) - set(resume_words))
+
+def stem(word):
+    """Light suffix-stripping stemmer: 'analyze', 'analyzing', 'analyzed' and 'analyzes' share a stem."""
+    # Plurals first, so 'abilities'/'ability' and 'companies'/'company' go through the same rules
+    if word.endswith("ies") and len(word) > 5:
+        word = word[:-3] + "y"
+    # Porter's SS rule: 'processes' -> 'process' and 'analyses' -> 'analysis', whose final 's' is kept
+    elif word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith("yses"):
+        word = word[:-2] + "is"
+    for suffix in _SUFFIXES:
+        if suffix == "s" and word.endswith(("ss", "ysis")):
+            break
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    # 'database'/'databases' and 'analyze'/'analyzes' differ only by a final 'e' at this point
+    return word[:-1] if word.endswith("e") and len(word) >= 5 else word
+
+def extract_keyword_terms(text):
+    """
+    Returns {stem: surface word} for the keywords in a text, with stopwords and
+    numbers removed. The first surface form seen for each stem is kept for display.
+    """
+    terms = {}
+    for word in re.findall(r'\b\w{4,}\b', (text or "").lower()):
+        if word in STOPWORDS or word.isdigit():
+            continue
+        terms.setdefault(stem(word), word)
+    return terms
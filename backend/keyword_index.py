@@ -0,0 +1,170 @@
+# backend/keyword_index.py
+"""
+Keyword sets stored per Resume and Job, computed once at ingest time.
+
+ResumeKeyword doubles as an inverted index (keyword stem -> resume ids), so
+missing-keyword and coverage queries over a candidate pool are answered with
+SQL over the index instead of re-tokenizing every text per request.
+"""
+from collections import defaultdict
+
+from models import db, Resume, Job, ResumeKeyword, JobKeyword, KeywordStat, load_resumes, load_jobs
+from keyword_analyzer import extract_keyword_terms, stem
+from scoring_engine import update_document_frequencies
+
+MAX_TERM_LENGTH = 64
+
+
+def _terms(text):
+    return {t: w for t, w in extract_keyword_terms(text).items() if len(t) <= MAX_TERM_LENGTH}
+
+
+def _update_document_frequencies(model, doc_column, ids, new_term_sets):
+    """Keeps the stored document frequencies in step with the index, in the same transaction."""
+    old_term_sets = defaultdict(set)
+    for doc_id, term in db.session.query(doc_column, model.term).filter(doc_column.in_(ids)):
+        old_term_sets[doc_id].add(term)
+    update_document_frequencies(old_term_sets.values(), new_term_sets)
+
+
+def index_resume_keywords(resumes):
+    """(Re)computes the keyword rows for the given Resume objects (ids must be assigned)."""
+    ids = [r.id for r in resumes]
+    if not ids:
+        return
+    term_sets = [_terms(r.full_text) for r in resumes]
+    _update_document_frequencies(ResumeKeyword, ResumeKeyword.resume_id, ids, term_sets)
+    ResumeKeyword.query.filter(ResumeKeyword.resume_id.in_(ids)).delete(synchronize_session=False)
+    rows = [{"resume_id": r.id, "term": t} for r, terms in zip(resumes, term_sets) for t in terms]
+    if rows:
+        db.session.bulk_insert_mappings(ResumeKeyword, rows)
+
+
+def index_job_keywords(jobs):
+    """(Re)computes the keyword rows for the given Job objects (ids must be assigned)."""
+    ids = [j.id for j in jobs]
+    if not ids:
+        return
+    term_sets = [_terms(j.description) for j in jobs]
+    _update_document_frequencies(JobKeyword, JobKeyword.job_id, ids, term_sets)
+    JobKeyword.query.filter(JobKeyword.job_id.in_(ids)).delete(synchronize_session=False)
+    rows = [{"job_id": j.id, "term": t, "word": w[:MAX_TERM_LENGTH]}
+            for j, terms in zip(jobs, term_sets) for t, w in terms.items()]
+    if rows:
+        db.session.bulk_insert_mappings(JobKeyword, rows)
+
+
+def ensure_resumes_indexed(resumes):
+    """Indexes any of the given resumes that have no keyword rows yet (e.g. rows created before the index)."""
+    ids = [r.id for r in resumes]
+    indexed = {rid for (rid,) in db.session.query(ResumeKeyword.resume_id)
+               .filter(ResumeKeyword.resume_id.in_(ids)).distinct()}
+    missing = [r for r in resumes if r.id not in indexed and r.full_text]
+    if missing:
+        index_resume_keywords(missing)
+        db.session.commit()
+
+
+def job_terms(job):
+    """{stem: surface word} for a job, indexing it on first use."""
+    rows = JobKeyword.query.filter_by(job_id=job.id).all()
+    if not rows and job.description:
+        index_job_keywords([job])
+        db.session.commit()
+        rows = JobKeyword.query.filter_by(job_id=job.id).all()
+    return {row.term: row.word for row in rows}
+
+
+def job_terms_many(job_ids):
+    """job_id -> {stem: surface word} for many jobs in one query, indexing jobs that have no rows yet."""
+    terms = {job_id: {} for job_id in job_ids}
+    for job_id, term, word in (db.session.query(JobKeyword.job_id, JobKeyword.term, JobKeyword.word)
+                               .filter(JobKeyword.job_id.in_(list(job_ids)))):
+        terms[job_id][term] = word
+    unindexed = [job_id for job_id, job in terms.items() if not job]
+    missing = [job for job in load_jobs(unindexed, with_text=True) if job.description] if unindexed else []
+    if missing:
+        index_job_keywords(missing)
+        db.session.commit()
+        for job in missing:
+            terms[job.id] = _terms(job.description)
+    return terms
+
+
+def resume_terms(text):
+    """Keyword stems of a resume text, as the index would store them (works for unstored resumes)."""
+    return set(_terms(text))
+
+
+def _present_terms(terms, resume_ids=None):
+    """resume_id -> set of the given terms present in that resume, from the inverted index."""
+    present = defaultdict(set)
+    if not terms:
+        return present
+    query = db.session.query(ResumeKeyword.resume_id, ResumeKeyword.term).filter(ResumeKeyword.term.in_(terms))
+    if resume_ids is not None:
+        query = query.filter(ResumeKeyword.resume_id.in_(resume_ids))
+    for resume_id, term in query:
+        present[resume_id].add(term)
+    return present
+
+
+def missing_keywords_for_job(job, resume_ids, terms=None):
+    """resume_id -> list of the job's keywords (surface forms) missing from that resume."""
+    terms = terms if terms is not None else job_terms(job)
+    present = _present_terms(list(terms), resume_ids)
+    return {rid: [word for term, word in terms.items() if term not in present[rid]] for rid in resume_ids}
+
+
+def keyword_coverage(job, resume_ids=None):
+    """
+    resume_id -> fraction of the job's keywords found in the resume. Without
+    `resume_ids`, every resume that shares at least one keyword is returned.
+    """
+    terms = job_terms(job)
+    if not terms:
+        return {}
+    query = (db.session.query(ResumeKeyword.resume_id, db.func.count(ResumeKeyword.term))
+             .filter(ResumeKeyword.term.in_(list(terms)))
+             .group_by(ResumeKeyword.resume_id))
+    if resume_ids is not None:
+        query = query.filter(ResumeKeyword.resume_id.in_(resume_ids))
+    coverage = {rid: 0.0 for rid in resume_ids or []}
+    coverage.update({rid: count / len(terms) for rid, count in query})
+    return coverage
+
+
+def rebuild_if_stale(batch_size=500):
+    """
+    Rebuilds both keyword tables when the stored job stems no longer match
+    stem() (i.e. they were written by an older stemmer). Needs an app context.
+    """
+    if all(stem(word) == term for term, word in db.session.query(JobKeyword.term, JobKeyword.word)):
+        return False
+    print("Backend: Keyword index was built with an older stemmer; rebuilding...")
+    ResumeKeyword.query.delete(synchronize_session=False)
+    JobKeyword.query.delete(synchronize_session=False)
+    KeywordStat.query.delete(synchronize_session=False)  # re-counted as the documents are indexed again
+    index_unindexed(batch_size)
+    return True
+
+
+def index_unindexed(batch_size=500):
+    """
+    Indexes every resume and job that has text but no keyword rows yet (e.g.
+    stored before the index existed); returns how many were indexed. Needs an
+    app context.
+    """
+    resume_ids = [rid for (rid,) in db.session.query(Resume.id).filter(
+        Resume.full_text.isnot(None), ~Resume.id.in_(db.session.query(ResumeKeyword.resume_id)))]
+    job_ids = [jid for (jid,) in db.session.query(Job.id).filter(
+        Job.description.isnot(None), ~Job.id.in_(db.session.query(JobKeyword.job_id)))]
+    if not resume_ids and not job_ids:
+        return 0
+    print(f"Backend: Indexing keywords for {len(resume_ids)} resumes and {len(job_ids)} jobs...")
+    for start in range(0, len(job_ids), batch_size):
+        index_job_keywords(load_jobs(job_ids[start:start + batch_size], with_text=True))
+    for start in range(0, len(resume_ids), batch_size):
+        index_resume_keywords(load_resumes(resume_ids[start:start + batch_size], with_text=True))
+    db.session.commit()
+    return len(resume_ids) + len(job_ids)
@@ -0,0 +1,137 @@
+# backend/metrics.py
+"""
+In-process metrics with Prometheus text exposition, served by /metrics in api.py.
+
+    with timed("encode"):
+        ...
+
+records the block's duration in the `resume_optimizer_stage_seconds` histogram
+under the label stage="encode".
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name, self.help_text, self.labelnames = name, help_text, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help_text, self.labelnames = name, help_text, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    labels = _format_labels(self.labelnames, key, {"le": bound})
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, {'le': '+Inf'})} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "resume_optimizer_stage_seconds", "Duration of pipeline stages in seconds.", ["stage"]
+)
+STAGE_ERRORS = Counter(
+    "resume_optimizer_stage_errors_total", "Pipeline stages that raised or timed out.", ["stage"]
+)
+HTTP_SECONDS = Histogram(
+    "resume_optimizer_http_request_seconds", "API request latency in seconds.", ["endpoint", "status"]
+)
+HF_RETRY_COUNT = Counter(
+    "resume_optimizer_hf_retries_total", "Hugging Face calls re-queued after a 429/503.", ["model"]
+)
+HF_RESPONSES = Counter(
+    "resume_optimizer_hf_responses_total", "Hugging Face responses by model and status code.", ["model", "status"]
+)
+
+PROMPT_TOKENS = Counter(
+    "resume_optimizer_prompt_tokens_total", "Estimated resume + JD prompt tokens before and after compaction.",
+    ["target", "kind"]
+)
+
+_metrics = [STAGE_SECONDS, STAGE_ERRORS, HTTP_SECONDS, HF_RETRY_COUNT, HF_RESPONSES, PROMPT_TOKENS]
+_collectors = []
+
+
+@contextmanager
+def timed(stage):
+    """Times the block into STAGE_SECONDS; exceptions are counted in STAGE_ERRORS and re-raised."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+def register_collector(fn):
+    """Registers a callable returning extra exposition lines (e.g. cache gauges) at scrape time."""
+    _collectors.append(fn)
+    return fn
+
+
+def sample_lines(name, help_text, values, labelname=None, kind="gauge"):
+    """Exposition lines for a collected metric; `values` maps a label value (or None) to a number."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for label, value in values.items():
+        labels = f'{{{labelname}="{label}"}}' if labelname and label is not None else ""
+        lines.append(f"{name}{labels} {value}")
+    return lines
+
+
+def render():
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        try:
+            lines.extend(collector())
+        except Exception as e:
+            lines.append(f"# collector {getattr(collector, '__name__', collector)} failed: {e}")
+    return "\n".join(lines) + "\n"
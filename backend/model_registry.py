@@ -0,0 +1,49 @@
+# backend/model_registry.py
+"""
+Lazy registry for heavy models and API clients.
+
+Modules register a loader at import time (cheap); the object is only built the
+first time `get()` is called, so scripts that never use a model never pay for it.
+"""
+import threading
+import time
+
+_loaders = {}
+_instances = {}
+_load_times = {}
+_lock = threading.Lock()
+
+
+def register(name, loader):
+    """Registers a zero-argument callable that builds the named object."""
+    _loaders[name] = loader
+
+
+def get(name):
+    """Returns the named object, building it on first use (thread-safe)."""
+    if name in _instances:
+        return _instances[name]
+    with _lock:
+        if name not in _instances:
+            if name not in _loaders:
+                raise KeyError(f"No loader registered for {name!r}")
+            start = time.perf_counter()
+            _instances[name] = _loaders[name]()
+            _load_times[name] = time.perf_counter() - start
+    return _instances[name]
+
+
+def is_loaded(name):
+    return name in _instances
+
+
+def warm_up(names=None):
+    """Eagerly builds the given (or all registered) objects, e.g. before a server starts taking traffic."""
+    for name in names or list(_loaders):
+        get(name)
+    return dict(_load_times)
+
+
+def load_times():
+    """Seconds spent building each loaded object."""
+    return dict(_load_times)
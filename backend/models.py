@@ -1,8 +1,44 @@
 # backend/models.py
+import hashlib
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import load_only
+
+from config import SQLITE_WAL, SQLITE_BUSY_TIMEOUT_MS, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE
 
 db = SQLAlchemy()
 
+def content_hash(text):
+    """sha256 of the whitespace-normalized text, used to deduplicate resumes and jobs."""
+    normalized = " ".join((text or "").split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+def engine_options(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for `uri`; in-memory SQLite keeps its single-connection pool."""
+    if uri.startswith("sqlite") and (uri in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in uri):
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+@event.listens_for(Engine, "connect")
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    # Only applies to SQLite connections; tuned for many concurrent readers
+    if type(dbapi_connection).__module__.startswith("sqlite3"):
+        cursor = dbapi_connection.cursor()
+        if SQLITE_WAL:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA cache_size=-20000")  # ~20 MB page cache
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
 class Candidate(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120))
@@ -12,16 +48,111 @@ class Candidate(db.Model):
 
 class Resume(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    candidate_id = db.Column(db.Integer, db.ForeignKey('candidate.id'))
+    candidate_id = db.Column(db.Integer, db.ForeignKey('candidate.id'), index=True)
     full_text = db.Column(db.Text)
+    content_hash = db.Column(db.String(64), unique=True, index=True)
+    candidate = db.relationship('Candidate', backref='resumes')
 
 class Job(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    title = db.Column(db.String(150))
+    title = db.Column(db.String(150), index=True)
     description = db.Column(db.Text)
+    content_hash = db.Column(db.String(64), unique=True, index=True)
+
+@event.listens_for(Resume, "before_insert")
+@event.listens_for(Resume, "before_update")
+def _hash_resume(mapper, connection, target):
+    target.content_hash = content_hash(target.full_text) if target.full_text else None
+
+@event.listens_for(Job, "before_insert")
+@event.listens_for(Job, "before_update")
+def _hash_job(mapper, connection, target):
+    target.content_hash = content_hash(target.description) if target.description else None
+
+class ResumeKeyword(db.Model):
+    # One row per (resume, keyword stem); the index on `term` is the inverted index.
+    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'), primary_key=True)
+    term = db.Column(db.String(64), primary_key=True, index=True)
+
+class JobKeyword(db.Model):
+    job_id = db.Column(db.Integer, db.ForeignKey('job.id'), primary_key=True)
+    term = db.Column(db.String(64), primary_key=True)
+    word = db.Column(db.String(64))  # surface form shown to users
+
+# KeywordStat row holding the number of indexed documents (keyword stems are never empty)
+DOC_COUNT_TERM = ""
+
+class KeywordStat(db.Model):
+    # Document frequency per keyword stem over all indexed resumes and jobs, written in the
+    # same transaction as their keyword rows, so every process reads current IDF weights.
+    term = db.Column(db.String(64), primary_key=True)
+    df = db.Column(db.Integer, nullable=False, default=0)
+
+class StoredAnalysis(db.Model):
+    # Persisted /analyze results; valid while both texts still hash to the stored values.
+    id = db.Column(db.Integer, primary_key=True)
+    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'), nullable=False)
+    job_id = db.Column(db.Integer, db.ForeignKey('job.id'), nullable=False)
+    resume_hash = db.Column(db.String(64), nullable=False)
+    job_hash = db.Column(db.String(64), nullable=False)
+    result = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    __table_args__ = (db.UniqueConstraint('resume_id', 'job_id', name='uq_stored_analysis_pair'),)
 
 class Skill(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(80), unique=True)
 
-# You would also create tables for rankings, etc.
\ No newline at end of file
+# You would also create tables for rankings, etc.
+
+# --- Schema setup ---
+def _add_hash_column(table, text_column):
+    """Adds and backfills content_hash on databases created before the column existed."""
+    columns = {c["name"] for c in inspect(db.engine).get_columns(table)}
+    if "content_hash" in columns:
+        return
+    with db.engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN content_hash VARCHAR(64)"))
+        seen = set()
+        for row_id, value in conn.execute(text(f"SELECT id, {text_column} FROM {table} ORDER BY id")).all():
+            digest = content_hash(value) if value else None
+            if digest in seen:
+                digest = None  # later duplicates keep a NULL hash rather than breaking the unique index
+            seen.add(digest)
+            conn.execute(text(f"UPDATE {table} SET content_hash = :h WHERE id = :id"), {"h": digest, "id": row_id})
+        conn.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS ix_{table}_content_hash ON {table} (content_hash)"))
+
+def init_db():
+    """Creates missing tables and upgrades older databases in place (call inside an app context)."""
+    db.create_all()
+    _add_hash_column("resume", "full_text")
+    _add_hash_column("job", "description")
+    with db.engine.begin() as conn:
+        # create_all does not add indexes to tables that already exist
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_resume_candidate_id ON resume (candidate_id)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_job_title ON job (title)"))
+    # Imported here: keyword_index depends on these models
+    from keyword_index import rebuild_if_stale, index_unindexed
+    from scoring_engine import backfill_document_frequencies
+    if not rebuild_if_stale():
+        backfill_document_frequencies()
+        # Rows stored before the keyword index existed, the way _add_hash_column backfills hashes
+        index_unindexed()
+
+# --- Bulk fetch helpers ---
+_RESUME_META = (Resume.id, Resume.candidate_id, Resume.content_hash)
+_JOB_META = (Job.id, Job.title, Job.content_hash)
+
+def load_resumes(ids=None, with_text=False):
+    """Loads many resumes in one query; without `with_text` the full_text column is not fetched."""
+    query = Resume.query if with_text else Resume.query.options(load_only(*_RESUME_META))
+    if ids is not None:
+        query = query.filter(Resume.id.in_(list(ids)))
+    return query.order_by(Resume.id).all()
+
+def load_jobs(ids=None, with_text=False):
+    """Loads many jobs in one query; without `with_text` the description column is not fetched."""
+    query = Job.query if with_text else Job.query.options(load_only(*_JOB_META))
+    if ids is not None:
+        query = query.filter(Job.id.in_(list(ids)))
+    return query.order_by(Job.id).all()
@@ -0,0 +1,101 @@
+# backend/pipeline.py
+"""
+Runs the independent analysis stages concurrently so a request takes about as
+long as its slowest stage (usually the Groq rewrite) instead of the sum of all.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from config import PIPELINE_WORKERS, STAGE_TIMEOUTS, STAGE_QUEUE_TIMEOUT
+from metrics import timed, STAGE_ERRORS
+from jd_matcher import match_resume_to_jd
+from keyword_analyzer import missing_keywords
+from score_generator import generate_score
+from ai_suggester import get_resume_suggestions, FALLBACK_SUGGESTIONS
+from resume_rewriter import rewrite_resume
+
+# Shared by all requests; stages are I/O bound (HTTP) or release the GIL (encoding).
+_executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="analysis")
+# Runs whole analyses in the background (kept separate so they never wait on their own stages)
+_background = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="analysis-bg")
+
+STAGES = {
+    "similarity": match_resume_to_jd,
+    "keywords": missing_keywords,
+    "suggestions": get_resume_suggestions,
+    "rewrite": rewrite_resume,
+}
+
+
+def _timed(name, fn, started_at, started, *args):
+    start = started_at[name] = time.perf_counter()
+    started.set()
+    with timed(name):
+        value = fn(*args)
+    return value, time.perf_counter() - start
+
+
+def run_analysis(resume_text, jd_text, stages=None, timeouts=None, scorer=None):
+    """
+    Runs the analysis stages for one resume/JD pair in parallel.
+
+    Returns a dict with one entry per stage (None when the stage failed or timed
+    out), the combined `score` when similarity and keywords are available, plus
+    `errors` and `timings` (seconds) keyed by stage name. `scorer(similarity,
+    keywords)` computes the score; the default flat penalty (generate_score) is
+    meant for ad-hoc JD text, stored jobs pass the IDF-weighted scorer instead.
+    """
+    stages = stages or STAGES
+    timeouts = {**STAGE_TIMEOUTS, **(timeouts or {})}
+    start = time.perf_counter()
+    started_at, started = {}, {name: threading.Event() for name in stages}
+    futures = {
+        name: _executor.submit(_timed, name, fn, started_at, started[name], resume_text, jd_text)
+        for name, fn in stages.items()
+    }
+
+    results = {name: None for name in stages}
+    errors, timings = {}, {}
+    for name, future in futures.items():
+        # The pool is shared, so a stage may sit in the queue behind other requests' LLM calls;
+        # its own timeout only starts once a worker picks it up
+        queue_left = max(STAGE_QUEUE_TIMEOUT - (time.perf_counter() - start), 0)
+        if not started[name].wait(timeout=queue_left):
+            if future.cancel():
+                STAGE_ERRORS.inc(stage=name)
+                errors[name] = f"not started within {STAGE_QUEUE_TIMEOUT:g}s (analysis workers busy)"
+                continue
+            started[name].wait()  # picked up just now
+        remaining = max(timeouts.get(name, 60) - (time.perf_counter() - started_at[name]), 0)
+        try:
+            results[name], timings[name] = future.result(timeout=remaining)
+        except TimeoutError:
+            future.cancel()
+            STAGE_ERRORS.inc(stage=name)
+            errors[name] = f"timed out after {timeouts.get(name, 60):g}s"
+        except Exception as e:
+            errors[name] = str(e)
+
+    if results.get("suggestions") == FALLBACK_SUGGESTIONS:
+        # The generic bullets are still shown, but the stage counts as failed so the result is not stored
+        STAGE_ERRORS.inc(stage="suggestions")
+        errors["suggestions"] = "no suggestion model answered; showing generic advice"
+
+    if results.get("similarity") is not None and results.get("keywords") is not None:
+        try:
+            results["score"] = (scorer or generate_score)(results["similarity"], results["keywords"])
+        except Exception as e:
+            results["score"] = None
+            errors["score"] = str(e)
+    else:
+        results["score"] = None
+    timings["total"] = time.perf_counter() - start
+    results["errors"] = errors
+    results["timings"] = {k: round(v, 3) for k, v in timings.items()}
+    return results
+
+
+def start_analysis(resume_text, jd_text, stages=None, timeouts=None, scorer=None):
+    """Runs run_analysis in the background and returns a Future with its result."""
+    return _background.submit(run_analysis, resume_text, jd_text, stages, timeouts, scorer)
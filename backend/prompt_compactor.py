@@ -0,0 +1,171 @@
+# backend/prompt_compactor.py
+"""
+Fits the resume and JD text of an LLM prompt into a per-model token budget.
+
+Both texts are split into small section-aligned chunks. Resume chunks are
+ranked by embedding similarity to the JD plus keyword overlap with it; JD
+chunks by how many distinct keywords they carry, so requirement lists win over
+company boilerplate. Resume chunks that carry JD keywords not yet covered are
+picked first, so the skills the JD asks for survive; the best remaining chunks
+are then kept, in their original order, until the budget is spent. Inputs that
+already fit are returned unchanged.
+
+Token counts are estimates (characters / PROMPT_CHARS_PER_TOKEN); budgets leave
+headroom for that.
+"""
+import numpy as np
+
+from config import (
+    PROMPT_TOKEN_BUDGETS, PROMPT_DEFAULT_BUDGET, PROMPT_JD_SHARE, PROMPT_CHUNK_WORDS,
+    PROMPT_EMBEDDING_WEIGHT, PROMPT_CHARS_PER_TOKEN,
+)
+from jd_matcher import encode_texts, split_into_chunks
+from keyword_analyzer import extract_keyword_terms
+from metrics import PROMPT_TOKENS
+
+
+def estimate_tokens(text):
+    text = text or ""
+    return int(round(len(text) / PROMPT_CHARS_PER_TOKEN)) if text.strip() else 0
+
+
+def budget_for(*models):
+    """The token budget for a prompt that may be sent to any of `models` (the smallest one wins)."""
+    return min(PROMPT_TOKEN_BUDGETS.get(m, PROMPT_DEFAULT_BUDGET) for m in models)
+
+
+def _normalize(values):
+    values = np.asarray(values, dtype=np.float32)
+    top = values.max() if len(values) else 0.0
+    return values / top if top > 0 else values
+
+
+def _keyword_overlap(chunks, reference_text):
+    reference = set(extract_keyword_terms(reference_text))
+    return _normalize([len(reference & set(extract_keyword_terms(c))) for c in chunks])
+
+
+def _semantic_similarity(chunks, reference_text):
+    """Cosine similarity of each chunk to the reference, or None when no embedding model is available."""
+    try:
+        embeddings = encode_texts([reference_text] + chunks)
+    except Exception as e:
+        print(f"Backend: Prompt compaction falling back to keyword overlap ({type(e).__name__}: {e})")
+        return None
+    embeddings = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    return np.clip(embeddings[1:] @ embeddings[0], 0.0, 1.0)
+
+
+def _resume_scores(chunks, jd_text):
+    keyword = _keyword_overlap(chunks, jd_text)
+    semantic = _semantic_similarity(chunks, jd_text)
+    if semantic is None:
+        return keyword
+    return PROMPT_EMBEDDING_WEIGHT * semantic + (1 - PROMPT_EMBEDDING_WEIGHT) * keyword
+
+
+def _jd_scores(chunks):
+    return _normalize([len(extract_keyword_terms(c)) for c in chunks])
+
+
+def _render(chunks, keep):
+    """Joins the kept chunks in document order, repeating each section header once."""
+    lines, section = [], None
+    for i in sorted(keep):
+        name, text = chunks[i]
+        if name != section:
+            if name:
+                lines.append(f"{name.title()}:")
+            section = name
+        lines.append(text)
+    return "\n".join(lines)
+
+
+def _cover_terms(chunks, costs, terms, budget):
+    """Greedily picks chunks adding the most uncovered `terms` per token; returns (indices, tokens used)."""
+    chunk_terms = [set(extract_keyword_terms(c)) & terms for _, c in chunks]
+    uncovered, keep, used = set(terms), [], 0
+    while uncovered:
+        gains = [
+            (len(found & uncovered) / max(costs[i], 1), -i)
+            for i, found in enumerate(chunk_terms)
+            if i not in keep and found & uncovered and used + costs[i] <= budget
+        ]
+        if not gains:
+            break
+        i = -max(gains)[1]
+        keep.append(i)
+        used += costs[i]
+        uncovered -= chunk_terms[i]
+    return keep, used
+
+
+def compact_text(text, budget, scores_fn, pin_first=False, required_terms=None):
+    """
+    Keeps the highest-scoring chunks of `text` that fit in `budget` tokens.
+    `scores_fn(chunk_texts)` returns one relevance score per chunk. With
+    `pin_first` an untitled top of the document (name and contact details) is
+    kept first; chunks covering `required_terms` (keyword stems) come next.
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+    chunks = split_into_chunks(text, PROMPT_CHUNK_WORDS)
+    scores = scores_fn([c for _, c in chunks])
+    costs = [estimate_tokens(c) + (estimate_tokens(name) + 1 if name else 0) for name, c in chunks]
+
+    keep, used = [], 0
+    if pin_first and chunks[0][0] == "" and costs[0] <= budget:
+        keep, used = [0], costs[0]
+    if required_terms:
+        covering, covering_cost = _cover_terms(chunks, costs, set(required_terms), budget - used)
+        keep += [i for i in covering if i not in keep]
+        used += covering_cost
+    for i in np.argsort(-scores, kind="stable"):
+        if int(i) not in keep and used + costs[i] <= budget:
+            keep.append(int(i))
+            used += costs[i]
+    if not keep:
+        # Not even one chunk fits: cut the best one down to size
+        best = int(np.argmax(scores))
+        return chunks[best][1][:int(budget * PROMPT_CHARS_PER_TOKEN)]
+    return _render(chunks, keep)
+
+
+def compact_pair(resume_text, jd_text, budget, target="llm"):
+    """
+    Returns (resume_text, jd_text, stats) fitting `budget` tokens between them.
+    The JD gets up to PROMPT_JD_SHARE of the budget and hands any unused share to
+    the resume. `stats` holds tokensBefore, tokensAfter, tokensSaved and
+    keywordsDropped (JD keywords present in the resume but not in what is kept);
+    token totals are also counted in the prompt_tokens metric under `target`.
+    """
+    resume_text, jd_text = (resume_text or "").strip(), (jd_text or "").strip()
+    resume_tokens, jd_tokens = estimate_tokens(resume_text), estimate_tokens(jd_text)
+    before = resume_tokens + jd_tokens
+    jd_terms = extract_keyword_terms(jd_text)
+    # Section headers ("Technical Skills") are not content the JD can ask for
+    resume_content = " ".join(c for _, c in split_into_chunks(resume_text, PROMPT_CHUNK_WORDS))
+    shared = {stem: word for stem, word in extract_keyword_terms(resume_content).items() if stem in jd_terms}
+
+    if before > budget:
+        jd_budget = min(jd_tokens, int(budget * PROMPT_JD_SHARE))
+        resume_budget = budget - jd_budget
+        if resume_tokens < resume_budget:
+            jd_budget = budget - resume_tokens
+        resume_text = compact_text(
+            resume_text, resume_budget, lambda chunks: _resume_scores(chunks, jd_text),
+            pin_first=True, required_terms=shared,
+        )
+        jd_text = compact_text(jd_text, jd_budget, _jd_scores)
+
+    after = estimate_tokens(resume_text) + estimate_tokens(jd_text)
+    kept = extract_keyword_terms(resume_text)
+    dropped = sorted(word for stem, word in shared.items() if stem not in kept)
+    PROMPT_TOKENS.inc(before, target=target, kind="original")
+    PROMPT_TOKENS.inc(after, target=target, kind="sent")
+    if after < before:
+        print(f"Backend: Compacted {target} prompt from ~{before} to ~{after} tokens (budget {budget}).")
+    if dropped:
+        print(f"Backend: Compaction dropped {len(dropped)} JD keywords found in the resume: {', '.join(dropped[:10])}")
+    stats = {"tokensBefore": before, "tokensAfter": after, "tokensSaved": before - after, "keywordsDropped": dropped}
+    return resume_text, jd_text, stats
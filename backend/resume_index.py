@@ -0,0 +1,301 @@
+# backend/resume_index.py
+import io
+import os
+import threading
+
+import numpy as np
+
+from config import (
+    RESUME_INDEX_PATH, RESUME_INDEX_MIN_TRAIN, RESUME_INDEX_NPROBE, RESUME_INDEX_USE_FAISS,
+    RESUME_INDEX_EF_SEARCH,
+)
+
+# FAISS is optional; the NumPy IVF index below is used when it is not installed.
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+
+def _normalize(matrix):
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _kmeans(vectors, n_clusters, iterations=10, seed=0):
+    """Plain Lloyd's k-means on unit vectors (cosine), returns normalized centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)]
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(n_clusters):
+            members = vectors[assignments == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+            else:
+                # Re-seed empty clusters so every list stays useful
+                centroids[c] = vectors[rng.integers(len(vectors))]
+        centroids = _normalize(centroids)
+    return centroids
+
+
+class ResumeIndex:
+    """
+    Persistent cosine-similarity index over resume embeddings.
+
+    Small collections are searched exactly. Once there are RESUME_INDEX_MIN_TRAIN
+    vectors the index trains an IVF (inverted file) layer and only scans the
+    `nprobe` closest clusters per query. If FAISS is installed, an HNSW graph
+    (`ef_search` candidates per query) is used for queries instead, while the
+    NumPy arrays remain the stored copy. The stored copy records `model_id`, the
+    embedding cache id its vectors came from.
+    """
+
+    def __init__(self, path=RESUME_INDEX_PATH, min_train=RESUME_INDEX_MIN_TRAIN,
+                 nprobe=RESUME_INDEX_NPROBE, use_faiss=RESUME_INDEX_USE_FAISS, ef_search=RESUME_INDEX_EF_SEARCH):
+        self.path = path
+        self.min_train = min_train
+        self.nprobe = nprobe
+        self.use_faiss = use_faiss and faiss is not None
+        self.ef_search = ef_search
+        self.model_id = None
+        self._lock = threading.RLock()
+        self.ids = np.empty(0, dtype=np.int64)
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+        self.centroids = None
+        self._lists = []
+        self._trained_size = 0
+        self._faiss_index = None
+        self._positions = {}
+        if path and os.path.exists(path):
+            self.load()
+
+    def __len__(self):
+        return len(self.ids)
+
+    # --- Persistence ---
+    def load(self):
+        with self._lock:
+            data = np.load(self.path)
+            self.ids = data["ids"].astype(np.int64)
+            self.vectors = data["vectors"].astype(np.float32)
+            self.centroids = data["centroids"] if "centroids" in data.files else None
+            self.model_id = str(data["model_id"]) if "model_id" in data.files else None
+            self._positions = {int(rid): i for i, rid in enumerate(self.ids)}
+            self._trained_size = len(self.ids) if self.centroids is not None else 0
+            self._rebuild_lists()
+            self._rebuild_faiss()
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            buffer = io.BytesIO()
+            arrays = {"ids": self.ids, "vectors": self.vectors}
+            if self.centroids is not None:
+                arrays["centroids"] = self.centroids
+            if self.model_id is not None:
+                arrays["model_id"] = np.array(self.model_id)
+            np.savez(buffer, **arrays)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(buffer.getvalue())
+            os.replace(tmp_path, self.path)
+
+    def ensure_model(self, model_id):
+        """Empties the index if its vectors came from another embedding model/backend than `model_id`."""
+        with self._lock:
+            if self.model_id == model_id:
+                return False
+            if len(self.ids):
+                print(f"Backend: Resume index was built with {self.model_id or 'an unrecorded model'}; "
+                      f"rebuilding it for {model_id}.")
+            self.ids = np.empty(0, dtype=np.int64)
+            self.vectors = np.empty((0, 0), dtype=np.float32)
+            self.centroids = None
+            self._lists, self._trained_size, self._faiss_index, self._positions = [], 0, None, {}
+            self.model_id = model_id
+            return True
+
+    # --- Building ---
+    def _rebuild_lists(self):
+        if self.centroids is None or not len(self.ids):
+            self._lists = []
+            return
+        assignments = np.argmax(self.vectors @ self.centroids.T, axis=1)
+        self._lists = [np.flatnonzero(assignments == c) for c in range(len(self.centroids))]
+
+    def _rebuild_faiss(self):
+        self._faiss_index = None
+        if not self.use_faiss or not len(self.ids):
+            return
+        index = faiss.IndexHNSWFlat(self.vectors.shape[1], 32, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efSearch = self.ef_search
+        index.add(self.vectors)
+        self._faiss_index = index
+
+    def train(self):
+        """(Re)clusters the stored vectors into ~sqrt(n) IVF lists."""
+        with self._lock:
+            if len(self.ids) < self.min_train:
+                self.centroids = None
+                self._lists = []
+                return
+            n_clusters = max(1, int(np.sqrt(len(self.ids))))
+            sample = self.vectors
+            if len(sample) > 50 * n_clusters:
+                rng = np.random.default_rng(0)
+                sample = sample[rng.choice(len(sample), 50 * n_clusters, replace=False)]
+            self.centroids = _kmeans(sample.copy(), n_clusters)
+            self._trained_size = len(self.ids)
+            self._rebuild_lists()
+
+    def add(self, resume_ids, embeddings, save=True):
+        """
+        Adds or replaces resume vectors. New vectors are appended to their nearest
+        IVF list; the clustering is retrained once the index has doubled in size.
+        """
+        embeddings = _normalize(embeddings)
+        with self._lock:
+            if not len(self.ids):
+                self.vectors = np.empty((0, embeddings.shape[1]), dtype=np.float32)
+
+            replaced = False
+            new_ids, new_rows = [], []
+            for rid, vector in zip(resume_ids, embeddings):
+                pos = self._positions.get(int(rid))
+                if pos is not None:
+                    self.vectors[pos] = vector
+                    replaced = True
+                else:
+                    new_ids.append(int(rid))
+                    new_rows.append(vector)
+
+            if new_ids:
+                start = len(self.ids)
+                self.ids = np.concatenate([self.ids, np.asarray(new_ids, dtype=np.int64)])
+                self.vectors = np.vstack([self.vectors, np.asarray(new_rows, dtype=np.float32)])
+                for offset, rid in enumerate(new_ids):
+                    self._positions[rid] = start + offset
+
+            if self.centroids is None or len(self.ids) >= 2 * max(self._trained_size, 1):
+                self.train()
+            elif replaced:
+                self._rebuild_lists()
+            elif new_ids:
+                rows = np.arange(start, len(self.ids))
+                assignments = np.argmax(self.vectors[rows] @ self.centroids.T, axis=1)
+                for c in np.unique(assignments):
+                    self._lists[c] = np.concatenate([self._lists[c], rows[assignments == c]])
+
+            if self.use_faiss:
+                if replaced or self._faiss_index is None:
+                    self._rebuild_faiss()
+                elif new_ids:
+                    self._faiss_index.add(np.asarray(new_rows, dtype=np.float32))
+
+            if save:
+                self.save()
+
+    # --- Querying ---
+    @staticmethod
+    def _top_k(rows, scores, k):
+        if len(rows) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[best], scores[best]
+        order = np.argsort(-scores)
+        return rows[order], scores[order]
+
+    def exact_search(self, query, k=10):
+        """Brute-force cosine search, used for small indexes and recall checks."""
+        with self._lock:
+            if not len(self.ids) or k <= 0:
+                return []
+            q = _normalize(query)[0]
+            rows, scores = self._top_k(np.arange(len(self.ids)), self.vectors @ q, k)
+            return [(int(self.ids[r]), float(s)) for r, s in zip(rows, scores)]
+
+    def search(self, query, k=10, nprobe=None, ef_search=None):
+        """Returns up to k (resume_id, cosine similarity) pairs, best first."""
+        with self._lock:
+            if not len(self.ids) or k <= 0:
+                return []
+            q = _normalize(query)
+            if self._faiss_index is not None:
+                self._faiss_index.hnsw.efSearch = ef_search or self.ef_search
+                scores, rows = self._faiss_index.search(q, min(k, len(self.ids)))
+                return [(int(self.ids[r]), float(s)) for r, s in zip(rows[0], scores[0]) if r >= 0]
+            if self.centroids is None:
+                return self.exact_search(q, k)
+
+            nprobe = min(nprobe or self.nprobe, len(self.centroids))
+            closest = np.argsort(-(self.centroids @ q[0]))[:nprobe]
+            rows = np.concatenate([self._lists[c] for c in closest])
+            if not len(rows):
+                return self.exact_search(q, k)
+            rows, scores = self._top_k(rows, self.vectors[rows] @ q[0], k)
+            return [(int(self.ids[r]), float(s)) for r, s in zip(rows, scores)]
+
+    def recall_at_k(self, queries, k=10, nprobe=None, ef_search=None):
+        """Average fraction of the exact top-k that search() also returns."""
+        queries = _normalize(queries)
+        if not len(queries):
+            return 1.0
+        total = 0.0
+        for q in queries:
+            exact = {rid for rid, _ in self.exact_search(q, k)}
+            approx = {rid for rid, _ in self.search(q, k, nprobe, ef_search)}
+            total += len(exact & approx) / max(len(exact), 1)
+        return total / len(queries)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_resume_index():
+    """Process-wide index instance, loaded from disk on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ResumeIndex()
+        return _index
+
+def _ensure_current_model(index):
+    """Empties the index when EMBEDDING_MODEL_NAME/EMBEDDING_BACKEND changed since it was built."""
+    from jd_matcher import embedding_cache_id
+
+    model_id = embedding_cache_id()
+    if index.model_id is not None and index.model_id != model_id:
+        model_id = embedding_cache_id(resolve=True)  # the prediction may miss an ONNX fallback
+    return index.ensure_model(model_id)
+
+def index_resumes(resumes):
+    """Encodes (via the embedding cache) and indexes a list of Resume rows."""
+    from jd_matcher import encode_texts
+
+    resumes = [r for r in resumes if r.full_text]
+    if not resumes:
+        return 0
+    embeddings = encode_texts([r.full_text for r in resumes])
+    index = get_resume_index()
+    # Resumes dropped here for a new model are added back by sync_resume_index
+    _ensure_current_model(index)
+    index.add([r.id for r in resumes], embeddings)
+    return len(resumes)
+
+def sync_resume_index():
+    """
+    Indexes stored resumes the index does not have yet, e.g. rows inserted
+    outside seed_db/ingest. Only ids are read for the check. Needs an app context.
+    """
+    from models import db, Resume, load_resumes
+
+    index = get_resume_index()
+    _ensure_current_model(index)
+    known = set(index.ids.tolist())
+    missing = [rid for (rid,) in db.session.query(Resume.id).filter(Resume.full_text.isnot(None))
+               if rid not in known]
+    if not missing:
+        return 0
+    return index_resumes(load_resumes(missing, with_text=True))
@@ -1,23 +1,83 @@
-import re
-from pdfminer.high_level import extract_text
-import docx2txt
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from config import PARSE_MAX_BYTES, PARSE_MAX_PAGES, PARSE_MAX_CHARS, PARSE_CACHE_SIZE
+from metrics import timed
+
+# Parsed text keyed by (file hash, extension, limits), so re-uploading the same file is free.
+_parse_cache = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+def _pdf_text(data, max_pages, max_chars):
+    """
+    Extracts PDF text page by page (same layout analysis as pdfminer's extract_text),
+    stopping after `max_pages` pages or once `max_chars` characters are extracted.
+    """
+    # Parsers are imported on first use to keep process startup fast
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+    from pdfminer.pdfpage import PDFPage
+
+    output = io.StringIO()
+    resources = PDFResourceManager(caching=True)
+    device = TextConverter(resources, output, laparams=LAParams())
+    try:
+        interpreter = PDFPageInterpreter(resources, device)
+        for page in PDFPage.get_pages(io.BytesIO(data), maxpages=max_pages, caching=True):
+            interpreter.process_page(page)
+            if output.tell() >= max_chars:
+                break
+    finally:
+        device.close()
+    return output.getvalue()
+
+def _docx_text(data):
+    import docx2txt
+    return docx2txt.process(io.BytesIO(data))
+
+def extract_resume_text_from_bytes(data, filename, max_pages=PARSE_MAX_PAGES, max_chars=PARSE_MAX_CHARS):
+    """
+    Extracts text from an in-memory resume file (PDF or DOCX), reading at most
+    `max_pages` PDF pages and returning at most `max_chars` characters.
+    Returns an empty string if no text can be extracted; raises ValueError if
+    the file is larger than PARSE_MAX_BYTES.
+    """
+    if len(data) > PARSE_MAX_BYTES:
+        raise ValueError(f"Resume file is too large ({len(data) // 1024} KB, limit {PARSE_MAX_BYTES // 1024} KB).")
+
+    extension = os.path.splitext(filename or "")[1].lower()
+    key = (hashlib.sha256(data).hexdigest(), extension, max_pages, max_chars)
+    with _parse_cache_lock:
+        if key in _parse_cache:
+            _parse_cache.move_to_end(key)
+            return _parse_cache[key]
+
+    text = ""
+    with timed("parse"):
+        if extension == ".pdf":
+            text = _pdf_text(data, max_pages, max_chars)
+        elif extension == ".docx":
+            text = _docx_text(data)
+
+    # Trim the surrounding whitespace and keep within the character budget
+    text = (text or "").strip()[:max_chars].strip()
+
+    with _parse_cache_lock:
+        _parse_cache[key] = text
+        while len(_parse_cache) > PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+    return text
 
 def extract_resume_text(file_path):
     """
     Extracts text from a resume file (PDF or DOCX).
     Returns an empty string if no text can be extracted.
     """
-    text = ""
-    if file_path.endswith(".pdf"):
-        text = extract_text(file_path)
-    elif file_path.endswith(".docx"):
-        text = docx2txt.process(file_path)
-
-    if text:
-        # Clean up the text by removing extra whitespace
-        # and ensure we don't call .group() on a None object
-        match = re.search(r'[^\s].*[^\s]', text, re.DOTALL)
-        if match:
-            return match.group(0)
-
-    return "" # Return an empty string if no text was found
\ No newline at end of file
+    if not file_path.lower().endswith((".pdf", ".docx")):
+        return "" # Return an empty string for unsupported files
+    with open(file_path, "rb") as f:
+        return extract_resume_text_from_bytes(f.read(), file_path)
@@ -1,27 +1,40 @@
 import os
-from groq import Groq
+import time
 from dotenv import load_dotenv
 
+import model_registry
+from llm_cache import llm_cache
+from prompt_compactor import compact_pair, budget_for
+from metrics import timed, STAGE_SECONDS
+
 # Load environment variables from .env file
 load_dotenv()
 
-try:
-    # Initialize the Groq client from the environment variable
-    client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
-except Exception as e:
-    print(f"Error initializing Groq client: {e}")
-    client = None
+def _load_client():
+    try:
+        from groq import Groq
+        # Initialize the Groq client from the environment variable
+        return Groq(api_key=os.environ.get("GROQ_API_KEY"))
+    except Exception as e:
+        print(f"Error initializing Groq client: {e}")
+        return None
+
+# The Groq client is created on first use.
+model_registry.register("groq_client", _load_client)
+
+GROQ_MODEL = "llama-3.1-8b-instant"  # Using the latest supported model
+GENERATION_PARAMS = {
+    "temperature": 0.5,
+    "max_tokens": 2048,  # Increased token limit for longer resumes
+}
 
 class AIAuthError(Exception):
     """Custom exception for authentication or initialization errors."""
     pass
 
-def rewrite_resume(resume_text, jd_text):
-    """
-    Rewrites a resume to be ATS-friendly and optimized for a specific job description using the Groq API.
-    """
-    if not client:
-        raise AIAuthError("Groq client not initialized. Check your GROQ_API_KEY in the .env file.")
+def _build_prompts(resume_text, jd_text):
+    """Returns the (system, user) prompts for a rewrite, with oversized inputs compacted to GROQ_MODEL's budget."""
+    resume_text, jd_text, _ = compact_pair(resume_text, jd_text, budget_for(GROQ_MODEL), "rewrite")
 
     # System prompt to define the AI's role and rules
     system_prompt = (
@@ -43,32 +56,102 @@ def rewrite_resume(resume_text, jd_text):
         f"--- Job Description ---\n{jd_text}"
     )
 
+    return system_prompt, user_prompt
+
+def rewrite_resume(resume_text, jd_text):
+    """
+    Rewrites a resume to be ATS-friendly and optimized for a specific job description using the Groq API.
+    """
+    system_prompt, user_prompt = _build_prompts(resume_text, jd_text)
+
+    cache_prompt = system_prompt + "\n" + user_prompt
+    cached = llm_cache.get(GROQ_MODEL, cache_prompt, GENERATION_PARAMS)
+    if cached:  # an empty entry (cached before empty completions were rejected) counts as a miss
+        return cached
+
+    client = model_registry.get("groq_client")
+    if not client:
+        raise AIAuthError("Groq client not initialized. Check your GROQ_API_KEY in the .env file.")
+
     print("Sending resume and JD to Groq API for optimization...")
 
     try:
         # API call to the Groq service
-        chat_completion = client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": system_prompt,
-                },
-                {
-                    "role": "user",
-                    "content": user_prompt,
-                },
-            ],
-            model="llama-3.1-8b-instant",  # Using the latest supported model
-            temperature=0.5,
-            max_tokens=2048, # Increased token limit for longer resumes
-        )
+        with timed("groq_call"):
+            chat_completion = client.chat.completions.create(
+                messages=[
+                    {
+                        "role": "system",
+                        "content": system_prompt,
+                    },
+                    {
+                        "role": "user",
+                        "content": user_prompt,
+                    },
+                ],
+                model=GROQ_MODEL,
+                **GENERATION_PARAMS,
+            )
         
         # Extract the optimized resume from the API response
-        response_text = chat_completion.choices[0].message.content
-        print("Successfully received optimized resume from Groq.")
-        return response_text.strip()
-
+        response_text = (chat_completion.choices[0].message.content or "").strip()
     except Exception as e:
         # Provide a clear error message if the API call fails
         print(f"An error occurred with the Groq API call: {e}")
-        raise RuntimeError(f"Failed to get a response from the Groq API: {e}")
\ No newline at end of file
+        raise RuntimeError(f"Failed to get a response from the Groq API: {e}")
+
+    if not response_text:
+        # Not cached, so the next request asks again instead of getting an empty rewrite for days
+        raise RuntimeError("The Groq API returned an empty rewrite.")
+    print("Successfully received optimized resume from Groq.")
+    llm_cache.set(GROQ_MODEL, cache_prompt, GENERATION_PARAMS, response_text)
+    return response_text
+
+def rewrite_resume_stream(resume_text, jd_text):
+    """
+    Streaming variant of rewrite_resume: yields text fragments as Groq produces them.
+    A cached rewrite is yielded in one piece; a completed stream is cached.
+    """
+    system_prompt, user_prompt = _build_prompts(resume_text, jd_text)
+
+    cache_prompt = system_prompt + "\n" + user_prompt
+    cached = llm_cache.get(GROQ_MODEL, cache_prompt, GENERATION_PARAMS)
+    if cached:  # an empty entry (cached before empty completions were rejected) counts as a miss
+        yield cached
+        return
+
+    client = model_registry.get("groq_client")
+    if not client:
+        raise AIAuthError("Groq client not initialized. Check your GROQ_API_KEY in the .env file.")
+
+    print("Streaming optimized resume from Groq API...")
+
+    start = time.perf_counter()
+    try:
+        stream = client.chat.completions.create(
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            model=GROQ_MODEL,
+            stream=True,
+            **GENERATION_PARAMS,
+        )
+        parts = []
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                if not parts:
+                    STAGE_SECONDS.observe(time.perf_counter() - start, stage="groq_stream_first_token")
+                parts.append(delta)
+                yield delta
+    except Exception as e:
+        print(f"An error occurred with the Groq API call: {e}")
+        raise RuntimeError(f"Failed to get a response from the Groq API: {e}")
+
+    STAGE_SECONDS.observe(time.perf_counter() - start, stage="groq_stream")
+    rewritten = "".join(parts).strip()
+    if not rewritten:
+        raise RuntimeError("The Groq API returned an empty rewrite.")
+    print("Finished streaming optimized resume from Groq.")
+    llm_cache.set(GROQ_MODEL, cache_prompt, GENERATION_PARAMS, rewritten)
@@ -3,3 +3,13 @@ def generate_score(similarity, missing_keywords):
     penalty = len(missing_keywords) * 1.5  # weight of missing keywords
     final_score = max(base_score - penalty, 0)
     return round(final_score, 2)
+
+def generate_weighted_score(similarity, missing_weight):
+    """
+    Like generate_score, but `missing_weight` is the IDF-weighted share (0-1) of the
+    JD's keywords missing from the resume, so rare, specific keywords cost more
+    than generic ones and long JDs don't push every score to zero.
+    """
+    from config import IDF_PENALTY_POINTS
+    final_score = max(similarity - missing_weight * IDF_PENALTY_POINTS, 0)
+    return round(final_score, 2)
@@ -0,0 +1,125 @@
+# backend/scoring_engine.py
+"""
+Corpus-aware keyword scoring.
+
+Document frequencies for every keyword stem across all stored Job and Resume
+keyword sets live in the KeywordStat table, which keyword_index updates in the
+same transaction as the keyword rows; every process therefore scores with the
+current corpus. Missing keywords are weighted by their BM25 IDF, and a whole
+candidate pool is scored with one sparse matrix-vector product.
+"""
+import math
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from models import db, ResumeKeyword, JobKeyword, KeywordStat, DOC_COUNT_TERM
+from score_generator import generate_weighted_score
+
+_UPSERT_STAT = text(
+    "INSERT INTO keyword_stat (term, df) VALUES (:term, :df)"
+    " ON CONFLICT (term) DO UPDATE SET df = keyword_stat.df + excluded.df"
+)
+
+
+def update_document_frequencies(old_term_sets, new_term_sets):
+    """
+    Moves documents from `old_term_sets` to `new_term_sets` in KeywordStat, within the
+    caller's transaction (needs an app context). Empty term sets are not documents.
+    """
+    delta = Counter()
+    for terms in old_term_sets:
+        if terms:
+            delta.subtract(set(terms))
+            delta[DOC_COUNT_TERM] -= 1
+    for terms in new_term_sets:
+        if terms:
+            delta.update(set(terms))
+            delta[DOC_COUNT_TERM] += 1
+    rows = [{"term": term, "df": change} for term, change in delta.items() if change]
+    if rows:
+        db.session.execute(_UPSERT_STAT, rows)
+
+
+def backfill_document_frequencies():
+    """Fills an empty KeywordStat from the keyword index (databases indexed before it existed)."""
+    if db.session.query(KeywordStat.term).first() is not None:
+        return
+    df = Counter()
+    for model, doc_column in ((ResumeKeyword, ResumeKeyword.resume_id), (JobKeyword, JobKeyword.job_id)):
+        df[DOC_COUNT_TERM] += db.session.query(db.func.count(db.distinct(doc_column))).scalar() or 0
+        for term, count in db.session.query(model.term, db.func.count()).group_by(model.term):
+            df[term] += count
+    if not df[DOC_COUNT_TERM]:
+        return
+    try:
+        db.session.bulk_insert_mappings(KeywordStat, [{"term": t, "df": n} for t, n in df.items()])
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()  # another process backfilled it first
+
+
+def idf(terms):
+    """BM25 IDF for each term; always positive, highest for rare terms."""
+    terms = list(terms)
+    df = dict(db.session.query(KeywordStat.term, KeywordStat.df)
+              .filter(KeywordStat.term.in_(terms + [DOC_COUNT_TERM])))
+    n = max(df.get(DOC_COUNT_TERM, 0), 0)
+    counts = [max(df.get(t, 0), 0) for t in terms]
+    return np.array([math.log(1 + (n - c + 0.5) / (c + 0.5)) for c in counts], dtype=np.float64)
+
+
+def missing_weights(job_terms, resume_ids):
+    """
+    IDF-weighted share (0-1) of the job's keywords missing from each resume, in
+    `resume_ids` order. Presence comes from the inverted index as a sparse
+    (resumes x job terms) matrix, so the pool is scored in one product.
+    """
+    terms = list(job_terms)
+    if not terms or not resume_ids:
+        return np.zeros(len(resume_ids))
+    weights = idf(terms)
+
+    row_of = {rid: i for i, rid in enumerate(resume_ids)}
+    col_of = {t: j for j, t in enumerate(terms)}
+    rows, cols = [], []
+    query = (db.session.query(ResumeKeyword.resume_id, ResumeKeyword.term)
+             .filter(ResumeKeyword.term.in_(terms), ResumeKeyword.resume_id.in_(resume_ids)))
+    for resume_id, term in query:
+        rows.append(row_of[resume_id])
+        cols.append(col_of[term])
+    presence = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)), shape=(len(resume_ids), len(terms))
+    )
+    covered = presence @ weights
+    return 1.0 - covered / weights.sum()
+
+
+def score_resumes(job_terms, resume_ids, similarities):
+    """Weighted final scores for many resumes at once, in `resume_ids` order."""
+    shares = missing_weights(job_terms, resume_ids)
+    return [generate_weighted_score(sim, float(share)) for sim, share in zip(similarities, shares)]
+
+
+def score_resume_against_jobs(resume_terms, jobs_terms, similarities):
+    """
+    Weighted final scores for one resume, given as its keyword stems (it need
+    not be stored), against several jobs' terms; same IDF weighting as score_resumes.
+    """
+    resume_terms = set(resume_terms)
+    jobs_terms = [list(job_terms) for job_terms in jobs_terms]
+    # One lookup for every job's terms
+    all_terms = list(dict.fromkeys(t for terms in jobs_terms for t in terms))
+    weight_of = dict(zip(all_terms, idf(all_terms)))
+    scores = []
+    for terms, similarity in zip(jobs_terms, similarities):
+        share = 0.0
+        if terms:
+            weights = np.array([weight_of[t] for t in terms], dtype=np.float64)
+            present = np.array([t in resume_terms for t in terms], dtype=np.float64)
+            share = 1.0 - float(present @ weights) / weights.sum()
+        scores.append(generate_weighted_score(similarity, share))
+    return scores
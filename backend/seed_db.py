@@ -1,7 +1,10 @@
 # backend/seed_db.py
 from api import app, db
-from models import Candidate, Resume, Job
+from models import Candidate, Resume, Job, content_hash, init_db
 from resume_parser import extract_resume_text
+from resume_index import index_resumes
+from keyword_index import index_resume_keywords, index_job_keywords
+from job_matcher import precompute_job_embeddings
 import os
 
 def seed_data():
@@ -23,11 +26,14 @@ def seed_data():
     resume_path = os.path.join(os.path.dirname(__file__), '..', 'resumes', 'Renuka_Yadav_Data_Analyst_Resume.pdf')
     resume_text = extract_resume_text(resume_path)
     
-    # Check if a resume for this candidate already exists to avoid duplicates
-    existing_resume = Resume.query.filter_by(candidate_id=candidate1.id, full_text=resume_text).first()
+    # Check if this resume text already exists to avoid duplicates (indexed hash lookup)
+    existing_resume = Resume.query.filter_by(content_hash=content_hash(resume_text)).first()
     if not existing_resume:
         new_resume = Resume(candidate_id=candidate1.id, full_text=resume_text)
         db.session.add(new_resume)
+        db.session.flush()  # assigns new_resume.id for the vector index
+        index_resumes([new_resume])
+        index_resume_keywords([new_resume])
 
     # --- Add a Job Description ---
     job_description_text = """
@@ -36,10 +42,13 @@ def seed_data():
     """
     
     # Check if the job already exists
-    existing_job = Job.query.filter_by(title='Data Analyst').first()
+    existing_job = Job.query.filter_by(content_hash=content_hash(job_description_text)).first()
     if not existing_job:
         new_job = Job(title='Data Analyst', description=job_description_text)
         db.session.add(new_job)
+        db.session.flush()
+        index_job_keywords([new_job])
+        precompute_job_embeddings([new_job])
 
     db.session.commit()
     print("Database has been seeded successfully.")
@@ -47,5 +56,5 @@ def seed_data():
 if __name__ == '__main__':
     with app.app_context():
         # This will create tables if they don't exist
-        db.create_all()
+        init_db()
         seed_data()
\ No newline at end of file
@@ -0,0 +1,150 @@
+# backend/task_queue.py
+"""
+SQLite-backed job queue for long-running analyses.
+
+Requests submit a (resume_id, job_id) pair and get a task id back immediately;
+a small pool of worker threads in the API process runs the pipeline and stores
+the JSON result. No external broker is needed, and queued tasks survive a
+restart. Submitting a pair that is already queued or running returns the
+existing task instead of creating a duplicate.
+
+A claimed task holds a lease that its process renews while the task runs;
+workers (in any process) only take over a running task once its lease has
+expired, i.e. when the process that claimed it has died.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from config import TASK_QUEUE_PATH, TASK_WORKERS, TASK_LEASE_SECONDS
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class TaskQueue:
+    def __init__(self, path=TASK_QUEUE_PATH, lease=TASK_LEASE_SECONDS):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.lease = lease
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._workers = []
+        self._held = set()  # ids of the tasks this process is running
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " id TEXT PRIMARY KEY,"
+            " resume_id INTEGER NOT NULL,"
+            " job_id INTEGER NOT NULL,"
+            " status TEXT NOT NULL,"
+            " result TEXT,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " lease_until REAL)"
+        )
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(tasks)")}
+        if "lease_until" not in columns:
+            # Queues created before leases; their RUNNING rows count as expired
+            self._conn.execute("ALTER TABLE tasks ADD COLUMN lease_until REAL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_tasks_status ON tasks (status, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_tasks_pair ON tasks (resume_id, job_id, status)")
+
+    def submit(self, resume_id, job_id):
+        """Returns (task_id, created); an in-flight task for the same pair is reused."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM tasks WHERE resume_id = ? AND job_id = ? AND status IN (?, ?)"
+                " ORDER BY created_at LIMIT 1",
+                (resume_id, job_id, QUEUED, RUNNING),
+            ).fetchone()
+            if row:
+                return row["id"], False
+            task_id = uuid.uuid4().hex
+            now = time.time()
+            self._conn.execute(
+                "INSERT INTO tasks (id, resume_id, job_id, status, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (task_id, resume_id, job_id, QUEUED, now, now),
+            )
+        self._wakeup.set()
+        return task_id, True
+
+    def get(self, task_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        if row is None:
+            return None
+        task = dict(row)
+        task["result"] = json.loads(task["result"]) if task["result"] else None
+        return task
+
+    def _claim(self):
+        """Takes the oldest queued task, or a running one whose lease expired with its process."""
+        claimable = "(status = ? OR (status = ? AND COALESCE(lease_until, 0) < ?))"
+        with self._lock:
+            while True:
+                now = time.time()
+                row = self._conn.execute(
+                    f"SELECT id, resume_id, job_id FROM tasks WHERE {claimable} ORDER BY created_at LIMIT 1",
+                    (QUEUED, RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                # Only one claimant can take a task, even across processes
+                claimed = self._conn.execute(
+                    f"UPDATE tasks SET status = ?, updated_at = ?, lease_until = ? WHERE id = ? AND {claimable}",
+                    (RUNNING, now, now + self.lease, row["id"], QUEUED, RUNNING, now),
+                ).rowcount
+                if claimed:
+                    self._held.add(row["id"])
+                    return dict(row)
+
+    def _renew_leases(self):
+        while True:
+            time.sleep(self.lease / 3)
+            with self._lock:
+                for task_id in self._held:
+                    self._conn.execute(
+                        "UPDATE tasks SET lease_until = ? WHERE id = ? AND status = ?",
+                        (time.time() + self.lease, task_id, RUNNING),
+                    )
+
+    def _finish(self, task_id, status, result=None, error=None):
+        with self._lock:
+            self._held.discard(task_id)
+            self._conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, error = ?, updated_at = ?, lease_until = NULL"
+                " WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), task_id),
+            )
+
+    def _work(self, handler):
+        while True:
+            task = self._claim()
+            if task is None:
+                self._wakeup.wait(timeout=1.0)
+                self._wakeup.clear()
+                continue
+            try:
+                self._finish(task["id"], DONE, result=handler(task["resume_id"], task["job_id"]))
+            except Exception as e:
+                self._finish(task["id"], FAILED, error=str(e))
+
+    def start_workers(self, handler, count=TASK_WORKERS):
+        """
+        Starts `count` daemon workers calling handler(resume_id, job_id) -> JSON-serializable result,
+        plus a thread renewing the leases of the tasks they run. Safe to call from every
+        process sharing the queue: tasks running elsewhere keep their live leases.
+        """
+        with self._lock:
+            if self._workers:
+                return
+            threading.Thread(target=self._renew_leases, name="task-lease", daemon=True).start()
+            for i in range(count):
+                worker = threading.Thread(target=self._work, args=(handler,), name=f"task-worker-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
@@ -1,13 +1,209 @@
+"""
+Fetches public LinkedIn profiles and extracts their experience and skills.
+
+Requests share one pooled session and a process-wide rate limit, and parsed
+profiles are cached on disk with a TTL, so repeated lookups never hit the
+network. `profile_text` renders a profile with plain section headers
+("Experience", "Skills") that the backend's keyword and embedding pipeline
+splits into sections like any resume.
+
+    profiles = fetch_profiles(["https://www.linkedin.com/in/someone", ...])
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 
-def extract_linkedin_info(profile_url):
-    headers = {
-        "User-Agent": "Mozilla/5.0"
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_PATH = os.getenv("LINKEDIN_CACHE_PATH", os.path.join(BASE_DIR, 'backend', 'instance', 'linkedin_cache.db'))
+CACHE_TTL = float(os.getenv("LINKEDIN_CACHE_TTL", str(24 * 3600)))  # seconds
+RATE_LIMIT = float(os.getenv("LINKEDIN_RATE_LIMIT", "1.0"))  # requests per second across all threads; 0 disables
+WORKERS = int(os.getenv("LINKEDIN_WORKERS", "4"))
+TIMEOUT = float(os.getenv("LINKEDIN_TIMEOUT", "15"))
+RETRIES = int(os.getenv("LINKEDIN_RETRIES", "3"))  # attempts per URL on 429/5xx
+MAX_TEXT_CHARS = int(os.getenv("LINKEDIN_MAX_TEXT_CHARS", "20000"))  # fallback page text when no sections are found
+
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+SECTIONS = ("experience", "skills")
+
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=WORKERS, pool_maxsize=WORKERS)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+_session.headers.update(HEADERS)
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart, across threads."""
+
+    def __init__(self, rate=RATE_LIMIT):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ProfileCache:
+    """Parsed profiles keyed by URL in SQLite; entries older than `ttl` count as misses."""
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS profiles ("
+            " url TEXT PRIMARY KEY,"
+            " profile TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, url):
+        with self._lock:
+            row = self._conn.execute("SELECT profile, fetched_at FROM profiles WHERE url = ?", (url,)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def set(self, url, profile):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profiles (url, profile, fetched_at) VALUES (?, ?, ?)",
+                (url, json.dumps(profile), time.time()),
+            )
+            self._conn.commit()
+
+
+_limiter = RateLimiter()
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache():
+    # Created on first use so importing the module never touches the disk
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ProfileCache()
+        return _cache
+
+
+def _clean(text):
+    return " ".join((text or "").split())
+
+
+def _find_section(soup, name):
+    """The <section> for `name`, matched by data-section/id/class or by its heading text."""
+    for section in soup.find_all("section"):
+        markers = [section.get("data-section") or "", section.get("id") or ""] + (section.get("class") or [])
+        if any(name in marker.lower() for marker in markers):
+            return section
+    for heading in soup.find_all(["h2", "h3"]):
+        if _clean(heading.get_text()).lower() == name:
+            return heading.find_parent("section") or heading.parent
+    return None
+
+
+def _section_items(section):
+    """One cleaned string per list item, or per non-heading text line when the section has no list."""
+    items = [_clean(li.get_text(separator=" ")) for li in section.find_all("li")]
+    if not items:
+        heading = section.find(["h2", "h3"])
+        heading_text = _clean(heading.get_text()) if heading else None
+        items = [_clean(line) for line in section.get_text(separator="\n").splitlines()]
+        items = [item for item in items if item != heading_text]
+    # Nested lists repeat their parent's text; keep the first occurrence of each item
+    return list(dict.fromkeys(item for item in items if item))
+
+
+def parse_profile(html):
+    """Returns {"name", "headline", "experience": [...], "skills": [...], "text"} from a profile page."""
+    soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+
+    title = soup.find("meta", attrs={"property": "og:title"})
+    h1 = soup.find("h1")
+    headline = soup.find(class_=lambda c: c and "headline" in c)
+    profile = {
+        "name": _clean(h1.get_text()) if h1 else _clean(title.get("content") if title else ""),
+        "headline": _clean(headline.get_text()) if headline else "",
     }
-    response = requests.get(profile_url, headers=headers)
-    soup = BeautifulSoup(response.text, 'html.parser')
+    for name in SECTIONS:
+        section = _find_section(soup, name)
+        profile[name] = _section_items(section) if section else []
+    # Kept for pages whose markup has no recognizable sections
+    profile["text"] = _clean(soup.get_text(separator=" "))[:MAX_TEXT_CHARS]
+    return profile
+
+
+def profile_text(profile):
+    """Plain text with "Experience"/"Skills" headers, ready for keyword extraction and embedding."""
+    if not any(profile.get(name) for name in SECTIONS):
+        return profile.get("text", "")
+    lines = [line for line in (profile.get("name"), profile.get("headline")) if line]
+    for name in SECTIONS:
+        if profile.get(name):
+            lines += ["", name.title()] + profile[name]
+    return "\n".join(lines)
 
-    # Try to extract experience/skills sections
-    text = soup.get_text(separator=' ')
-    return text[:2000]  # Trim to avoid overload
+
+def _get(url):
+    for attempt in range(RETRIES):
+        _limiter.wait()
+        response = _session.get(url, timeout=TIMEOUT)
+        if response.status_code != 429 and response.status_code < 500:
+            break
+        if attempt + 1 < RETRIES:
+            retry_after = response.headers.get("Retry-After", "")
+            time.sleep(float(retry_after) if retry_after.isdigit() else 2.0 * (attempt + 1))
+    response.raise_for_status()
+    return response.text
+
+
+def fetch_profile(url, use_cache=True):
+    """Fetches and parses one profile; served from the disk cache while it is fresh."""
+    cache = _get_cache()
+    if use_cache:
+        cached = cache.get(url)
+        if cached is not None:
+            return cached
+    profile = {"url": url, **parse_profile(_get(url))}
+    cache.set(url, profile)
+    return profile
+
+
+def fetch_profiles(urls, workers=WORKERS, use_cache=True):
+    """
+    Fetches many profiles concurrently (still within the rate limit). Returns
+    {url: profile}; a URL that failed maps to {"url": url, "error": message}.
+    """
+    unique = list(dict.fromkeys(urls))
+
+    def fetch(url):
+        try:
+            return fetch_profile(url, use_cache)
+        except Exception as e:
+            return {"url": url, "error": f"{type(e).__name__}: {e}"}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(unique) or 1))) as pool:
+        return dict(zip(unique, pool.map(fetch, unique)))
+
+
+def extract_linkedin_info(profile_url):
+    """Profile text for one URL (experience and skills sections when the page has them)."""
+    return profile_text(fetch_profile(profile_url))